@@ -7,5 +7,9 @@ class FormsConfig(AppConfig):
     def register_signals(self):
         from . import signals
 
+    def register_checks(self):
+        from . import checks
+
     def ready(self):
         self.register_signals()
+        self.register_checks()
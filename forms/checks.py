@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+# caches that only live in the memory of one process
+LOCAL_CACHE_BACKENDS = ["django.core.cache.backends.locmem.LocMemCache"]
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    form bundles, translation catalogs, permission snapshots and verified tokens are
+    invalidated through the default cache, which has to be shared by all workers
+    """
+    backend = settings.CACHES.get("default", {}).get("BACKEND")
+    if backend in LOCAL_CACHE_BACKENDS:
+        return [
+            Warning(
+                "The default cache is local to each process, changes are only "
+                "seen by the worker that made them until the cached entries expire.",
+                hint="Set CACHE_BACKEND and CACHE_LOCATION to a memcached or redis "
+                "server shared by all workers.",
+                id="forms.W001",
+            )
+        ]
+    return []
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.2 on 2026-10-18 08:26
+
+import json
+
+from django.db import migrations, models
+
+from teams.utils import cert_to_jwk
+
+
+def build_recipient_keys(apps, schema_editor):
+    Form = apps.get_model("forms", "Form")
+    TeamCertificate = apps.get_model("teams", "TeamCertificate")
+
+    for form in Form.objects.all():
+        keys = []
+        for team in form.teams.order_by("pk"):
+            certificate = TeamCertificate.objects.filter(
+                team=team, status="active"
+            ).first()
+            if certificate:
+                keys.append(
+                    cert_to_jwk(certificate.certificate, certificate.public_key)
+                )
+        form.recipient_keys = json.dumps(keys)
+        form.save(update_fields=["recipient_keys"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("teams", "0007_auto_20210509_1258"),
+        ("forms", "0018_delete_encryptionkey"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="form",
+            name="recipient_keys",
+            field=models.TextField(default="[]", editable=False),
+        ),
+        migrations.RunPython(build_recipient_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.2 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forms", "0019_form_recipient_keys"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="formsubmission",
+            index=models.Index(
+                fields=["form", "submitted_at", "id"], name="formsubmission_sync_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.2 on 2026-10-18 09:09
+
+import json
+
+from django.db import migrations, models
+
+
+def compile_schemas(apps, schema_editor):
+    Form = apps.get_model("forms", "Form")
+    FormSchema = apps.get_model("forms", "FormSchema")
+    for form in Form.objects.all():
+        schema = {}
+        for key, text in (
+            FormSchema.objects.filter(form=form)
+            .order_by("pk")
+            .values_list("key", "schema")
+        ):
+            schema[key] = json.loads(text)
+        form.compiled_schema = json.dumps(schema)
+        form.schema_version = 1
+        form.save(update_fields=["compiled_schema", "schema_version"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forms", "0020_formsubmission_sync_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="form",
+            name="compiled_schema",
+            field=models.TextField(default="{}", editable=False),
+        ),
+        migrations.AddField(
+            model_name="form",
+            name="schema_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(compile_schemas, migrations.RunPython.noop),
+    ]
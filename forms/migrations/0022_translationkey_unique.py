@@ -0,0 +1,35 @@
+# Generated by Django 3.2.2 on 2026-10-18 09:12
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_keys(apps, schema_editor):
+    """keep the latest value of every key, it is the one that was written last"""
+    TranslationKey = apps.get_model("forms", "TranslationKey")
+    duplicates = (
+        TranslationKey.objects.values("translation", "key")
+        .annotate(count=Count("pk"), latest=Max("pk"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        TranslationKey.objects.filter(
+            translation=duplicate["translation"], key=duplicate["key"]
+        ).exclude(pk=duplicate["latest"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forms", "0021_form_compiled_schema"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="translationkey",
+            constraint=models.UniqueConstraint(
+                fields=("translation", "key"), name="unique_key_per_translation"
+            ),
+        ),
+    ]
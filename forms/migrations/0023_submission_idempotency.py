@@ -0,0 +1,41 @@
+# Generated by Django 3.2.2 on 2026-10-18 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forms", "0022_translationkey_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="formsubmission",
+            name="content_hash",
+            field=models.CharField(default="", editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="formsubmission",
+            name="idempotency_key",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name="formsubmission",
+            name="signed_content",
+            field=models.TextField(default="", editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="formsubmission",
+            index=models.Index(
+                fields=["form", "content_hash"], name="formsubmission_content_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="formsubmission",
+            constraint=models.UniqueConstraint(
+                fields=("form", "idempotency_key"),
+                name="unique_submission_idempotency_key",
+            ),
+        ),
+    ]
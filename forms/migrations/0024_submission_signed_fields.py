@@ -0,0 +1,43 @@
+# Generated by Django 3.2.2 on 2026-10-18 14:10
+
+import json
+
+from django.db import migrations
+
+
+def drop_form_data(apps, schema_editor):
+    """the form data is stored in FormSubmission.data already"""
+    FormSubmission = apps.get_model("forms", "FormSubmission")
+    submissions = FormSubmission.objects.exclude(signed_fields="")
+    for submission in submissions.iterator():
+        signed_fields = json.loads(submission.signed_fields)
+        signed_fields.pop("form_data", None)
+        submission.signed_fields = json.dumps(signed_fields)
+        submission.save(update_fields=["signed_fields"])
+
+
+def restore_form_data(apps, schema_editor):
+    FormSubmission = apps.get_model("forms", "FormSubmission")
+    submissions = FormSubmission.objects.exclude(signed_fields="")
+    for submission in submissions.iterator():
+        signed_fields = json.loads(submission.signed_fields)
+        submission.signed_fields = json.dumps(
+            {"form_data": submission.data, **signed_fields}
+        )
+        submission.save(update_fields=["signed_fields"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forms", "0023_submission_idempotency"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="formsubmission",
+            old_name="signed_content",
+            new_name="signed_fields",
+        ),
+        migrations.RunPython(drop_form_data, restore_form_data),
+    ]
@@ -54,14 +54,21 @@ class Form(models.Model):
     teams = models.ManyToManyField(
         Team, related_name="forms"
     )  # teams that can decrypt the submissions
+    # serialized list of the team jwks the submissions are encrypted for,
+    # rebuilt by FormService.rebuild_recipient_keys when teams or certificates change
+    recipient_keys = models.TextField(default="[]", editable=False)
+    # the schemas of the form merged into one json document by key, recompiled by
+    # FormSchemaService.compile_form_schema whenever a schema changes
+    compiled_schema = models.TextField(default="{}", editable=False)
+    schema_version = models.PositiveIntegerField(default=0, editable=False)
 
     @property
-    def generated_schema(self):
-        schema = {}
-        for e in self.schemas:
-            schema[e.name] = json.loads(e.schema)
+    def recipient_public_keys(self) -> [str]:
+        return json.loads(self.recipient_keys)
 
-        return schema
+    @property
+    def generated_schema(self):
+        return json.loads(self.compiled_schema)
 
     def __str__(self):
         return self.name
@@ -96,12 +103,23 @@ class FormTranslation(models.Model):
 
 
 class TranslationKey(models.Model):
+    # FormTranslationService writes keys in bulk with an INSERT ... ON CONFLICT
+    # upsert that doesn't send post_save, so it invalidates the form bundle and the
+    # translation catalogs itself instead of relying on the receivers in
+    # forms.signals
     translation = models.ForeignKey(
         FormTranslation, on_delete=models.CASCADE, related_name="translation_keys"
     )
     key = models.CharField(max_length=255)
     value = models.TextField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["translation", "key"], name="unique_key_per_translation"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.key} ({self.translation})"
 
@@ -111,6 +129,29 @@ class FormSubmission(models.Model):
     signature = models.TextField()
     form = models.ForeignKey(Form, on_delete=models.CASCADE)
     submitted_at = models.DateTimeField(auto_now_add=True)
+    # the signed fields besides the form data, for replaying the signed content
+    # to retries; only stored if the submission can be replayed
+    signed_fields = models.TextField(default="", editable=False)
+    idempotency_key = models.CharField(max_length=255, null=True, blank=True)
+    content_hash = models.CharField(max_length=64, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            # incremental sync of the submissions of a form
+            models.Index(
+                fields=["form", "submitted_at", "id"],
+                name="formsubmission_sync_idx",
+            ),
+            models.Index(
+                fields=["form", "content_hash"], name="formsubmission_content_idx"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["form", "idempotency_key"],
+                name="unique_submission_idempotency_key",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.form} ({self.submitted_at})"
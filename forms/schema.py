@@ -20,6 +20,8 @@ from serious_django_graphene import (
 from graphql_relay.node.node import from_global_id
 from graphene_django.filter import DjangoFilterConnectionField
 from graphene.utils.str_converters import to_snake_case
+from graphene_file_upload.scalars import Upload
+from graphql import GraphQLError
 
 ## Queries
 from serious_django_services import NotPassed
@@ -44,9 +46,26 @@ from forms.services.forms import (
     FormTranslationService,
 )
 from graphene_permissions.permissions import AllowAuthenticated
+from schema_utils.dataloaders import DataLoaderConnectionField, load_related
+from schema_utils.optimizer import optimize_queryset
 
 
-class FormNode(DjangoObjectType):
+class FormRelationsMixin:
+    """relations of FormNode and InternalFormNode, loaded in batches"""
+
+    schemas = DataLoaderConnectionField(lambda: InternalFormSchemaNode, required=True)
+    translations = DataLoaderConnectionField(
+        lambda: InternalFormTranslationNode, required=True
+    )
+
+    def resolve_schemas(self, info, **kwargs):
+        return load_related(info, self, "schemas")
+
+    def resolve_translations(self, info, **kwargs):
+        return load_related(info, self, "translations")
+
+
+class FormNode(FormRelationsMixin, DjangoObjectType):
     class Meta:
         model = Form
         filter_fields = ["id"]
@@ -57,7 +76,7 @@ class FormNode(DjangoObjectType):
         return queryset.filter(active=True)
 
 
-class InternalFormNode(DjangoObjectType):
+class InternalFormNode(FormRelationsMixin, DjangoObjectType):
     class Meta:
         model = Form
         filter_fields = ["id"]
@@ -83,6 +102,9 @@ class FormSchemaNode(DjangoObjectType):
     def get_queryset(cls, queryset, info):
         return queryset.filter(form__active=True)
 
+    def resolve_form(self, info):
+        return load_related(info, self, "form")
+
 
 class FormTranslationNode(DjangoObjectType):
     class Meta:
@@ -101,6 +123,9 @@ class TranslationKeyNode(DjangoObjectType):
         filter_fields = ["id"]
         interfaces = (relay.Node,)
 
+    def resolve_translation(self, info):
+        return load_related(info, self, "translation")
+
 
 class InternalFormSchemaNode(DjangoObjectType):
     class Meta:
@@ -108,6 +133,9 @@ class InternalFormSchemaNode(DjangoObjectType):
         filter_fields = ["id"]
         interfaces = (relay.Node,)
 
+    def resolve_form(self, info):
+        return load_related(info, self, "form")
+
     @classmethod
     @permissions_checker([IsAuthenticated, CanEditFormPermission])
     def get_node(cls, info, id):
@@ -124,6 +152,9 @@ class FormSubmissionNode(PermissionDjangoObjectType):
         filter_fields = ["id"]
         interfaces = (relay.Node,)
 
+    def resolve_form(self, info):
+        return load_related(info, self, "form")
+
     @classmethod
     @permissions_checker([IsAuthenticated, CanRetrieveFormSubmissionsPermission])
     def get_node(cls, info, id):
@@ -139,11 +170,21 @@ class FormSubmissionNode(PermissionDjangoObjectType):
 
 
 class InternalFormTranslationNode(PermissionDjangoObjectType):
+    translation_keys = DataLoaderConnectionField(
+        lambda: TranslationKeyNode, required=True
+    )
+
     class Meta:
         model = FormTranslation
         filter_fields = ["id", "language"]
         interfaces = (relay.Node,)
 
+    def resolve_form(self, info):
+        return load_related(info, self, "form")
+
+    def resolve_translation_keys(self, info, **kwargs):
+        return load_related(info, self, "translation_keys")
+
     @classmethod
     @permissions_checker([IsAuthenticated, CanEditFormPermission])
     def get_node(cls, info, id):
@@ -154,6 +195,17 @@ class InternalFormTranslationNode(PermissionDjangoObjectType):
         return item
 
 
+class FormSubmissionFeedNode(ObjectType):
+    """submissions that arrived after a cursor"""
+
+    submissions = graphene.List(FormSubmissionNode)
+    # pass this to the next query to only get newer submissions
+    cursor = graphene.String()
+    has_more = graphene.Boolean()
+    # seconds to wait before asking for newer submissions again
+    poll_interval = graphene.Float()
+
+
 class Query(graphene.ObjectType):
     # get a single form
     form = relay.Node.Field(FormNode)
@@ -163,6 +215,14 @@ class Query(graphene.ObjectType):
     all_forms = DjangoFilterConnectionField(FormNode)
     # get a list of available form submissions
     all_form_submissions = DjangoFilterConnectionField(FormSubmissionNode)
+    # get the submissions that arrived after a cursor, waiting up to `wait` seconds
+    # for new ones if the instance allows it
+    form_submissions_since = graphene.Field(
+        FormSubmissionFeedNode,
+        cursor=graphene.String(),
+        limit=graphene.Int(default_value=100),
+        wait=graphene.Float(default_value=0),
+    )
 
     # get all forms - also inactive, for the admin interface
     internal_form = relay.Node.Field(InternalFormNode)
@@ -172,15 +232,30 @@ class Query(graphene.ObjectType):
     form_schema = relay.Node.Field(FormSchemaNode)
     internal_form_schema = relay.Node.Field(InternalFormSchemaNode)
 
+    def resolve_all_forms(self, info, **kwargs):
+        return optimize_queryset(Form.objects.all(), info)
+
     @permissions_checker([IsAuthenticated, CanRetrieveFormSubmissionsPermission])
     def resolve_all_form_submissions(self, info, **kwargs):
         user = get_user_from_info(info)
-        return FormReceiverService.retrieve_submitted_forms(user)
+        return optimize_queryset(
+            FormReceiverService.retrieve_submitted_forms(user), info
+        )
+
+    @permissions_checker([IsAuthenticated, CanRetrieveFormSubmissionsPermission])
+    def resolve_form_submissions_since(self, info, limit, wait, cursor=None):
+        user = get_user_from_info(info)
+        try:
+            return FormReceiverService.retrieve_submissions_since(
+                user, cursor=cursor, limit=limit, wait=wait
+            )
+        except FormReceiverService.exceptions as e:
+            raise GraphQLError(str(e))
 
     @permissions_checker([IsAuthenticated, CanEditFormPermission])
     def resolve_all_internal_forms(self, info, **kwargs):
         user = get_user_from_info(info)
-        return Form.objects.all()
+        return optimize_queryset(Form.objects.all(), info)
 
 
 class SubmitForm(FailableMutation):
@@ -190,10 +265,13 @@ class SubmitForm(FailableMutation):
     class Arguments:
         form_id = graphene.ID(required=True)
         content = graphene.String(required=True)
+        idempotency_key = graphene.String()
 
-    def mutate(self, info, form_id, content):
+    def mutate(self, info, form_id, content, idempotency_key=None):
         try:
-            result = FormService.submit(int(from_global_id(form_id)[1]), content)
+            result = FormService.submit(
+                int(from_global_id(form_id)[1]), content, idempotency_key
+            )
         except FormService.exceptions as e:
             raise MutationExecutionException(str(e))
         return SubmitForm(success=True, **result)
@@ -319,6 +397,49 @@ class UpdateFormTranslationKey(FailableMutation):
         return UpdateFormTranslationKey(success=True, translation_key=result)
 
 
+class TranslationStringInputType(graphene.InputObjectType):
+    key = graphene.String(required=True)
+    value = graphene.String(required=True)
+
+
+class UpdateFormTranslationKeys(FailableMutation):
+    form_translation = graphene.Field(InternalFormTranslationNode)
+    created = graphene.Int()
+    updated = graphene.Int()
+    unchanged = graphene.Int()
+    # the entries of an uploaded file that couldn't be imported
+    skipped = graphene.List(graphene.String)
+
+    class Arguments:
+        translation_id = graphene.ID(required=True)
+        strings = graphene.List(TranslationStringInputType)
+        # a json, xliff or po file instead of the strings
+        file = Upload()
+
+    @permissions_checker([IsAuthenticated, CanEditFormPermission])
+    def mutate(self, info, translation_id, strings=None, file=None):
+        user = get_user_from_info(info)
+        translation_id = int(from_global_id(translation_id)[1])
+        try:
+            if file is not None:
+                result = FormTranslationService.import_translation_file(
+                    user, translation_id, file
+                )
+            else:
+                result = FormTranslationService.update_translation_strings(
+                    user,
+                    translation_id,
+                    {string["key"]: string["value"] for string in strings or []},
+                )
+        except FormTranslationService.exceptions as e:
+            raise MutationExecutionException(str(e))
+        return UpdateFormTranslationKeys(
+            success=True,
+            form_translation=FormTranslation.objects.get(pk=translation_id),
+            **result,
+        )
+
+
 class UpdateFormTranslation(FailableMutation):
     form_translation = graphene.Field(InternalFormTranslationNode)
 
@@ -391,6 +512,7 @@ class Mutation(graphene.ObjectType):
     create_form_translation = CreateFormTranslation.Field()
     update_form_translation = UpdateFormTranslation.Field()
     update_form_translation_key = UpdateFormTranslationKey.Field()
+    update_form_translation_keys = UpdateFormTranslationKeys.Field()
     create_or_update_schema = CreateOrUpdateFormSchema.Field()
 
 
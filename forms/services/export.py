@@ -0,0 +1,70 @@
+import io
+import json
+import tarfile
+from typing import Iterable, Iterator
+
+
+def _serialize(submission: dict) -> dict:
+    return {
+        "id": submission["id"],
+        "form_id": submission["form_id"],
+        "submitted_at": submission["submitted_at"].isoformat(),
+        "data": submission["data"],
+        "signature": submission["signature"],
+    }
+
+
+def iter_ndjson(submissions: Iterable[dict]) -> Iterator[bytes]:
+    """
+    serialize submissions as newline delimited json, one submission per line
+    :param submissions: dicts with the id, form_id, submitted_at, data and signature
+    :return: iterator of the encoded lines
+    """
+    for submission in submissions:
+        yield (json.dumps(_serialize(submission)) + "\n").encode()
+
+
+class _StreamBuffer(io.RawIOBase):
+    """write only file object whose content is taken out after every tar member"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.chunks.append(bytes(b))
+        return len(b)
+
+    def pop(self) -> bytes:
+        content = b"".join(self.chunks)
+        self.chunks = []
+        return content
+
+
+def iter_tar(submissions: Iterable[dict]) -> Iterator[bytes]:
+    """
+    serialize submissions as an uncompressed tar stream, with the armored message of
+    each submission in <id>.asc, its signature in <id>.sig and the metadata in <id>.json
+    :param submissions: dicts with the id, form_id, submitted_at, data and signature
+    :return: iterator of the tar blocks
+    """
+    buffer = _StreamBuffer()
+    # the stream mode never seeks, so every member can be handed out right away
+    with tarfile.open(fileobj=buffer, mode="w|") as archive:
+        for submission in submissions:
+            serialized = _serialize(submission)
+            members = {
+                "asc": serialized.pop("data"),
+                "sig": serialized.pop("signature"),
+                "json": json.dumps(serialized),
+            }
+            for extension, content in members.items():
+                content = content.encode()
+                info = tarfile.TarInfo(f"{submission['id']}.{extension}")
+                info.size = len(content)
+                info.mtime = int(submission["submitted_at"].timestamp())
+                archive.addfile(info, io.BytesIO(content))
+            yield buffer.pop()
+    yield buffer.pop()
@@ -1,15 +1,26 @@
-from typing import List, Tuple
+from typing import Any, Dict, List, Tuple
 
 from collections import Iterable
 from datetime import timedelta, datetime
+import base64
+import binascii
+import hashlib
 import json
+import re
+import time
+import uuid
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction, IntegrityError
+from django.db.models import F, Q
+from django.utils import timezone
 
 from django.contrib.auth.models import User, AbstractUser, Group
 from django.utils.translation import gettext_lazy as _
 
 from serious_django_services import Service, NotPassed, CRUDMixin
 import pgpy
+from languages.regions import REGIONS
 
 from forms.forms import (
     UpdateFormForm,
@@ -30,7 +41,18 @@ from forms.models import (
 )
 from forms.permissions import (
     CanAddFormTranslationPermission,
+    CanRetrieveFormSubmissionsPermission,
 )
+from forms.services.translation_files import (
+    parse_translation_file,
+    TranslationFileException,
+)
+from forms.services.signing import (
+    SignatureKeyStore,
+    SignatureKeyStoreException,
+    get_signing_backend,
+)
+from oauth.languages import Language, LanguageRegistry
 from teams.permissions import CanActivateEncryptionKeyPermission
 
 
@@ -38,6 +60,16 @@ class FormServiceException(Exception):
     pass
 
 
+# fields of the form bundle that are stored as json on the form
+PRESERIALIZED_BUNDLE_FIELDS = ("schema", "recipient_keys")
+
+REGION_CODES = frozenset(code for code, name in REGIONS)
+
+# rows per upsert statement, every row binds 3 parameters and sqlite before 3.32
+# allows at most 999 per statement (postgres allows 65535)
+TRANSLATION_UPSERT_BATCH_SIZE = 300
+
+
 class FormService(Service, CRUDMixin):
     service_exceptions = (FormServiceException,)
 
@@ -63,63 +95,222 @@ class FormService(Service, CRUDMixin):
         return form
 
     @classmethod
-    def retrieve_public_keys_for_form(cls, form_id: int) -> [Team]:
+    def retrieve_public_keys_for_form(cls, form_id: int) -> [str]:
         """
         retrieve the public keys the form content should be encrypted with
         :param form_id: id of the form the content is for
-        :return: an Iterable of EncryptionKey objects
+        :return: a list of the jwks of all teams receiving the form
         """
         form = cls.retrieve_form(form_id)
-        return Team.objects.filter(forms__in=[form]).all()
+        return form.recipient_public_keys
+
+    @classmethod
+    def rebuild_recipient_keys(cls, form_id: int) -> [str]:
+        """
+        rebuild the stored list of public keys the form content should be encrypted with
+        :param form_id: id of the form
+        :return: a list of the jwks of all teams with an active certificate
+        """
+        keys = [
+            team.public_key
+            for team in Team.objects.filter(forms__id=form_id).order_by("pk")
+        ]
+        keys = [key for key in keys if key is not None]
+        Form.objects.filter(pk=form_id).update(recipient_keys=json.dumps(keys))
+        cls.invalidate_form_bundle(form_id)
+        return keys
+
+    @classmethod
+    def build_form_bundle(cls, form_id: int) -> dict:
+        """
+        build everything a client needs to render and submit a form
+        :param form_id: id of the form
+        :return: dict with the code, the merged schema, the translation catalogs per
+        language and the recipient keys of the form; the schema and the recipient
+        keys are the json stored on the form (see PRESERIALIZED_BUNDLE_FIELDS)
+        """
+        form = cls.retrieve_form(form_id)
+
+        active_translations = FormTranslationService.retrieve_active_translations(
+            form.pk
+        )
+        translations = {
+            language: FormTranslationService.compile_translation_catalog(
+                active_translations, language
+            )
+            for language in sorted({t.language for t in active_translations})
+        }
+
+        return {
+            "id": form.pk,
+            "name": form.name,
+            "description": form.description,
+            "js_code": form.js_code,
+            "schema": form.compiled_schema,
+            "translations": translations,
+            "recipient_keys": form.recipient_keys,
+        }
 
     @classmethod
-    def submit(cls, form_id: int, content: str) -> dict:
+    def serialize_form_bundle(cls, bundle: dict) -> str:
+        """
+        serialize a bundle like json.dumps(bundle, sort_keys=True), the already
+        serialized fields are inserted as they are instead of being parsed and
+        dumped again
+        :param bundle: the bundle returned by build_form_bundle
+        :return: the json content
+        """
+        return "{%s}" % ", ".join(
+            "{}: {}".format(
+                json.dumps(key),
+                value
+                if key in PRESERIALIZED_BUNDLE_FIELDS
+                else json.dumps(value, sort_keys=True),
+            )
+            for key, value in sorted(bundle.items())
+        )
+
+    @classmethod
+    def retrieve_form_bundle(cls, form_id: int) -> dict:
+        """
+        get the serialized bundle of a form, built once and then served from the cache
+        until the form, its schemas, translations or recipients change
+        :param form_id: id of the form
+        :return: dict with the json content and its etag
+        """
+        cache_key = f"form-bundle:{form_id}"
+        bundle = cache.get(cache_key)
+        if bundle is None:
+            content = cls.serialize_form_bundle(cls.build_form_bundle(form_id))
+            bundle = {
+                "content": content,
+                "etag": hashlib.sha256(content.encode()).hexdigest(),
+            }
+            cache.set(cache_key, bundle, settings.FORM_BUNDLE_CACHE_TIMEOUT)
+        return bundle
+
+    @classmethod
+    def invalidate_form_bundle(cls, form_id: int):
+        """
+        drop the cached bundle of a form, now and once the transaction is committed
+        :param form_id: id of the form
+        """
+        cache_key = f"form-bundle:{form_id}"
+        cache.delete(cache_key)
+        # a request reading the form before the change is committed may have
+        # cached the old bundle again
+        transaction.on_commit(lambda: cache.delete(cache_key))
+
+    @classmethod
+    def submit(cls, form_id: int, content: str, idempotency_key: str = None) -> dict:
         """receives encrypted form data and signs it
         :param form_id: id of the form the content is for
         :param content: pgp encrypted form content
+        :param idempotency_key: key chosen by the client, retries with the same key
+        get the receipt of the first submission instead of submitting again
         :returns: object with signed content and the signature
         """
 
         form = FormService.retrieve_form(form_id)
 
-        # load the signature key
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= 255:
+            raise FormServiceException("The idempotency key is invalid.")
+        content_hash = hashlib.sha256(content.encode()).hexdigest()
+
+        previous = cls._retrieve_previous_submission(
+            form, content_hash, idempotency_key
+        )
+        if previous is not None:
+            return cls._submission_receipt(previous, content_hash)
+
+        # the signature key is parsed and unlocked once per process
         try:
-            # we currently   load the primary key b/c of a bug in pgpy
-            signature_key = SignatureKey.objects.filter(
-                active=True, key_type=SignatureKey.SignatureKeyType.SECONDARY
-            ).get()
-            pkey = pgpy.PGPKey()
-            pkey.parse(signature_key.private_key)
-
-        except SignatureKey.DoesNotExist:
-            raise FormServiceException(
-                _("Couldn't sign form because there are no signing keys available.")
-            )
+            signature_key = SignatureKeyStore.get()
+        except SignatureKeyStoreException as e:
+            raise FormServiceException(str(e))
 
         created_at = datetime.now()
-        signed_content = json.dumps(
-            {
-                "form_data": content,
-                "timestamp": created_at.isoformat(),
-                "public_key_server": str(pkey.pubkey),
-                "public_keys_recipients": [
-                    pubkey.public_key
-                    for pubkey in FormService.retrieve_public_keys_for_form(form.pk)
-                ],
-                "form_id": form.pk,
-                "form_name": form.name,
-            }
-        )
+        signed_fields = {
+            "timestamp": created_at.isoformat(),
+            "public_key_server": signature_key.public_key,
+            "public_keys_recipients": form.recipient_public_keys,
+            "form_id": form.pk,
+            "form_name": form.name,
+        }
         # build the object that should be signed
-        with pkey.subkeys[signature_key.subkey_id].unlock(settings.SECRET_KEY):
-            signature = pkey.subkeys[signature_key.subkey_id].sign(signed_content)
+        signed_content = cls._signed_content(content, signed_fields)
+        signature = str(get_signing_backend().sign(signature_key, signed_content))
 
-        FormSubmission.objects.create(
-            signature=signature, data=content, submitted_at=created_at, form=form
+        # only submissions that can be replayed keep what is needed to rebuild
+        # their signed content, the form data itself is stored once anyway
+        replayable = (
+            idempotency_key is not None or settings.FORM_SUBMISSION_DEDUPLICATE_CONTENT
         )
+        try:
+            with transaction.atomic():
+                FormSubmission.objects.create(
+                    signature=signature,
+                    data=content,
+                    submitted_at=created_at,
+                    form=form,
+                    signed_fields=json.dumps(signed_fields) if replayable else "",
+                    idempotency_key=idempotency_key,
+                    content_hash=content_hash,
+                )
+        except IntegrityError:
+            if idempotency_key is None:
+                raise
+            # a concurrent retry with the same key was stored first
+            previous = FormSubmission.objects.get(
+                form=form, idempotency_key=idempotency_key
+            )
+            return cls._submission_receipt(previous, content_hash)
 
         return {"content": signed_content, "signature": signature}
 
+    @staticmethod
+    def _signed_content(form_data: str, signed_fields: dict) -> str:
+        return json.dumps({"form_data": form_data, **signed_fields})
+
+    @classmethod
+    def _retrieve_previous_submission(
+        cls, form: Form, content_hash: str, idempotency_key: str = None
+    ) -> FormSubmission:
+        if idempotency_key is not None:
+            return FormSubmission.objects.filter(
+                form=form, idempotency_key=idempotency_key
+            ).first()
+        if not settings.FORM_SUBMISSION_DEDUPLICATE_CONTENT:
+            return None
+        # submissions from before the receipts were stored can't be replayed
+        return (
+            FormSubmission.objects.filter(
+                form=form,
+                content_hash=content_hash,
+                submitted_at__gte=timezone.now()
+                - timedelta(seconds=settings.FORM_SUBMISSION_IDEMPOTENCY_WINDOW),
+            )
+            .exclude(signed_fields="")
+            .order_by("-submitted_at")
+            .first()
+        )
+
+    @classmethod
+    def _submission_receipt(cls, submission: FormSubmission, content_hash: str) -> dict:
+        if submission.content_hash != content_hash:
+            raise FormServiceException(
+                "The idempotency key was already used for another submission."
+            )
+        window = timedelta(seconds=settings.FORM_SUBMISSION_IDEMPOTENCY_WINDOW)
+        if submission.submitted_at < timezone.now() - window:
+            raise FormServiceException("The idempotency key has expired.")
+        return {
+            "content": cls._signed_content(
+                submission.data, json.loads(submission.signed_fields)
+            ),
+            "signature": submission.signature,
+        }
+
     @classmethod
     def update_form_(
         cls,
@@ -221,6 +412,23 @@ class FormSchemaService(Service):
 
         return True
 
+    @classmethod
+    def compile_form_schema(cls, form_id: int):
+        """
+        merge the schemas of a form into its compiled_schema and bump its version
+        :param form_id: id of the form
+        """
+        # the schemas are valid json already, so they are joined without parsing
+        compiled = "{%s}" % ", ".join(
+            f"{json.dumps(key)}: {schema}"
+            for key, schema in FormSchema.objects.filter(form_id=form_id)
+            .order_by("pk")
+            .values_list("key", "schema")
+        )
+        Form.objects.filter(pk=form_id).update(
+            compiled_schema=compiled, schema_version=F("schema_version") + 1
+        )
+
     @classmethod
     def create_form_schema(
         cls, user: AbstractUser, key: str, form_id: int, schema: str
@@ -238,9 +446,7 @@ class FormSchemaService(Service):
 
         form = Form.objects.get(pk=form_id)
         cls._validate_json_schema(schema)
-        schema = FormSchema.objects.create(key=key, form=form, schema=schema)
-        schema.save()
-        return schema
+        return FormSchema.objects.create(key=key, form=form, schema=schema)
 
     @classmethod
     def create_or_update_form_schema(
@@ -321,9 +527,7 @@ class FormTranslationService(Service, CRUDMixin):
                 "You are not allowed to add a translation to this form"
             )
 
-        if f"{language}-{region}" not in [
-            a["iso_code"] for a in cls.get_available_languages()
-        ]:
+        if not LanguageRegistry.is_available(f"{language}-{region}"):
             raise FormServiceException(
                 f"{language}-{region} is not configured as a supported language"
             )
@@ -354,8 +558,7 @@ class FormTranslationService(Service, CRUDMixin):
 
         # if a language was configured when it was still available we should still support updating
         if (
-            f"{language}-{region}"
-            not in [a["iso_code"] for a in cls.get_available_languages()]
+            not LanguageRegistry.is_available(f"{language}-{region}")
             and language != translation.language
         ):
             raise FormServiceException(
@@ -396,30 +599,248 @@ class FormTranslationService(Service, CRUDMixin):
                 "You are not allowed to change a translation for this form"
             )
 
-        try:
-            trans_key = TranslationKey.objects.get(key=key, translation=translation.pk)
-            trans_key = TranslationKeyService._update(
-                trans_key.pk, {"value": value, "key": key}
+        cls._validate_translation_strings({key: value})
+        cls._upsert_translation_strings(translation.pk, {key: value})
+        FormService.invalidate_form_bundle(translation.form_id)
+        cls.invalidate_translation_catalogs(translation.form_id)
+
+        return TranslationKey.objects.get(translation=translation.pk, key=key)
+
+    @classmethod
+    def _validate_translation_strings(cls, strings: Dict[str, str]) -> bool:
+        """
+        check the keys and values before they are written without a model form
+        :param strings: dict of the translation keys and values
+        :return: True if they are valid
+        """
+        max_length = TranslationKey._meta.get_field("key").max_length
+        for key, value in strings.items():
+            if not key or len(key) > max_length:
+                raise FormServiceException(f"The translation key '{key}' is invalid.")
+            if not isinstance(value, str):
+                raise FormServiceException(f"The value of '{key}' is no string.")
+
+        return True
+
+    @classmethod
+    def _upsert_translation_strings(cls, translation_id: int, strings: Dict[str, str]):
+        """
+        insert the keys of a translation or update their values if they exist, in
+        one statement per batch so concurrent writers can't create duplicates
+        :param translation_id: id of the translation
+        :param strings: dict of the translation keys and values
+        """
+        items = list(strings.items())
+        if connection.vendor not in ("postgresql", "sqlite"):
+            # no upsert, the unique constraint still rejects duplicates
+            with transaction.atomic():
+                for key, value in items:
+                    TranslationKey.objects.update_or_create(
+                        translation_id=translation_id,
+                        key=key,
+                        defaults={"value": value},
+                    )
+            return
+
+        quote_name = connection.ops.quote_name
+        table = quote_name(TranslationKey._meta.db_table)
+        translation_column, key_column, value_column = (
+            quote_name(TranslationKey._meta.get_field(field).column)
+            for field in ("translation", "key", "value")
+        )
+        # both databases understand the same ON CONFLICT clause
+        with connection.cursor() as cursor:
+            for start in range(0, len(items), TRANSLATION_UPSERT_BATCH_SIZE):
+                batch = items[start : start + TRANSLATION_UPSERT_BATCH_SIZE]
+                cursor.execute(
+                    f"INSERT INTO {table} "
+                    f"({translation_column}, {key_column}, {value_column}) "
+                    f"VALUES {', '.join(['(%s, %s, %s)'] * len(batch))} "
+                    f"ON CONFLICT ({translation_column}, {key_column}) "
+                    f"DO UPDATE SET {value_column} = EXCLUDED.{value_column}",
+                    [
+                        param
+                        for key, value in batch
+                        for param in (translation_id, key, value)
+                    ],
+                )
+
+    @classmethod
+    def update_translation_strings(
+        cls, user: AbstractUser, translation_id: int, strings: Dict[str, str]
+    ) -> Dict[str, int]:
+        """
+        create/update many translations at once
+        :param user: the user calling the service
+        :param translation_id: the translation_id these strings are related to
+        :param strings: dict of the translation keys and values
+        :return: the number of created, updated and unchanged keys
+        """
+        translation = FormTranslation.objects.get(pk=translation_id)
+
+        if not user.has_perm(CanAddFormTranslationPermission):
+            raise PermissionError(
+                "You are not allowed to change a translation for this form"
             )
-        except TranslationKey.DoesNotExist:
-            trans_key = TranslationKeyService._create(
-                {
-                    "translation": translation_id,
-                    "key": key,
-                    "value": value,
-                }
+
+        cls._validate_translation_strings(strings)
+
+        existing = dict(translation.translation_keys.values_list("key", "value"))
+        created = [key for key in strings.keys() if key not in existing]
+        updated = [
+            key
+            for key in strings.keys()
+            if key in existing and existing[key] != strings[key]
+        ]
+
+        with transaction.atomic():
+            cls._upsert_translation_strings(
+                translation.pk, {key: strings[key] for key in created + updated}
             )
+        # the upsert doesn't send any signals
+        FormService.invalidate_form_bundle(translation.form_id)
+        cls.invalidate_translation_catalogs(translation.form_id)
 
-        return trans_key
+        return {
+            "created": len(created),
+            "updated": len(updated),
+            "unchanged": len(strings) - len(created) - len(updated),
+        }
 
     @classmethod
-    def get_available_languages(cls):
-        """get all activated languages for this formularium instance"""
-        languages = []
-        for language in settings.LANGUAGES:
-            languages.append({"language": language[1], "iso_code": language[0]})
+    def import_translation_file(
+        cls, user: AbstractUser, translation_id: int, file
+    ) -> Dict[str, Any]:
+        """
+        create/update the translations of an uploaded json, xliff or po file
+        :param user: the user calling the service
+        :param translation_id: the translation_id these strings are related to
+        :param file: the uploaded file
+        :return: the number of created, updated and unchanged keys, and the entries
+        of the file that were skipped
+        """
+        try:
+            parsed = parse_translation_file(file.name, file.read())
+        except TranslationFileException as e:
+            raise FormServiceException(str(e))
+        result = cls.update_translation_strings(user, translation_id, parsed.strings)
+        return {**result, "skipped": parsed.skipped}
+
+    @classmethod
+    def retrieve_active_translations(cls, form_id: int) -> List[FormTranslation]:
+        """
+        get the active translations of a form with their keys
+        :param form_id: id of the form
+        :return: the translations, oldest first
+        """
+        return list(
+            FormTranslation.objects.filter(form=form_id, active=True)
+            .prefetch_related("translation_keys")
+            .order_by("pk")
+        )
+
+    @classmethod
+    def compile_translation_catalog(
+        cls, translations: List[FormTranslation], locale: str
+    ) -> Dict[str, str]:
+        """
+        merge translations into the flat catalog of a locale, a key is taken from the
+        first of: the translation for the language and region of the locale, the
+        other regions of its language, the instance default language (LANGUAGE_CODE)
+        :param translations: the active translations of a form
+        :param locale: language-region (e.g. de-AT) or language (e.g. de)
+        :return: dict of the translation keys and values
+        """
+
+        def chain(locale: str) -> List[FormTranslation]:
+            language, _, region = locale.partition("-")
+            language = language.lower()
+            matching = [t for t in translations if t.language.lower() == language]
+            exact = [t for t in matching if t.region.upper() == region.upper()]
+            return exact + [t for t in matching if t not in exact]
+
+        ordered = []
+        for translation in chain(locale) + chain(settings.LANGUAGE_CODE):
+            if translation not in ordered:
+                ordered.append(translation)
+
+        catalog = {}
+        # the most specific translation is applied last
+        for translation in reversed(ordered):
+            for translation_key in translation.translation_keys.all():
+                catalog[translation_key.key] = translation_key.value
+        return catalog
+
+    @staticmethod
+    def _translation_catalog_version_key(form_id: int) -> str:
+        return f"translation-catalog-version:{form_id}"
+
+    @classmethod
+    def retrieve_translation_catalog(cls, form_id: int, locale: str) -> dict:
+        """
+        get the serialized translation catalog of a public form for a locale, built
+        once and then served from the cache until a translation of the form changes
+        :param form_id: id of the form
+        :param locale: language-region (e.g. de-AT) or language (e.g. de) of a
+        language configured on this instance
+        :return: dict with the json content and its etag
+        """
+        if not re.fullmatch(r"[a-zA-Z]{2,3}(-[a-zA-Z]{2})?", locale):
+            raise FormServiceException(f"{locale} is not a valid locale.")
+        language, region = (locale.split("-") + [""])[:2]
+        language, region = language.lower(), region.upper()
+        locale = f"{language}-{region}" if region else language
+        # every locale gets its own cache entry, so only the languages of this
+        # instance in a known region are served
+        if not LanguageRegistry.is_available_language(language) or (
+            region and region not in REGION_CODES
+        ):
+            raise FormServiceException(f"{locale} is not a supported language.")
+
+        # the catalog remembers the version it was built for, so it is read
+        # together with the current version in one go
+        version_key = cls._translation_catalog_version_key(form_id)
+        cache_key = f"translation-catalog:{form_id}:{locale}"
+        cached = cache.get_many([version_key, cache_key])
+        version = cached.get(version_key)
+        if version is None:
+            cache.add(version_key, uuid.uuid4().hex, None)
+            version = cache.get(version_key)
+
+        catalog = cached.get(cache_key)
+        if catalog is None or catalog["version"] != version:
+            FormService.retrieve_form(form_id)
+            content = json.dumps(
+                cls.compile_translation_catalog(
+                    cls.retrieve_active_translations(form_id), locale
+                ),
+                sort_keys=True,
+            )
+            catalog = {
+                "content": content,
+                "etag": hashlib.sha256(content.encode()).hexdigest(),
+                "version": version,
+            }
+            cache.set(cache_key, catalog, settings.FORM_BUNDLE_CACHE_TIMEOUT)
+        return catalog
 
-        return languages
+    @classmethod
+    def invalidate_translation_catalogs(cls, form_id: int):
+        """
+        drop the cached translation catalogs of a form, of all locales, now and once
+        the transaction is committed
+        :param form_id: id of the form
+        """
+        version_key = cls._translation_catalog_version_key(form_id)
+        cache.set(version_key, uuid.uuid4().hex, None)
+        # a request reading the translations before the change is committed may
+        # have cached the old catalogs under the new version
+        transaction.on_commit(lambda: cache.set(version_key, uuid.uuid4().hex, None))
+
+    @classmethod
+    def get_available_languages(cls) -> Tuple[Language, ...]:
+        """get all activated languages for this formularium instance"""
+        return LanguageRegistry.languages()
 
 
 class FormReceiverService(Service):
@@ -443,3 +864,116 @@ class FormReceiverService(Service):
         """
         accessible_forms = cls.retrieve_accessible_forms(user)
         return FormSubmission.objects.filter(form__in=accessible_forms)
+
+    @classmethod
+    def export_submissions(
+        cls,
+        user: AbstractUser,
+        form_id: int = None,
+        team_id: int = None,
+        submitted_after: datetime = None,
+        submitted_before: datetime = None,
+    ) -> Iterable:
+        """
+        iterate over the accessible submissions in chunks, without keeping them in memory
+        :param user: the user calling the service
+        :param form_id: only export the submissions of this form
+        :param team_id: only export the submissions of forms received by this team
+        :param submitted_after: only export submissions submitted at or after this time
+        :param submitted_before: only export submissions submitted before this time
+        :return: iterator of dicts with the id, form_id, submitted_at, data and signature
+        """
+        if not user.has_perm(CanRetrieveFormSubmissionsPermission):
+            raise PermissionError("You are not allowed to retrieve form submissions.")
+
+        submissions = cls.retrieve_submitted_forms(user)
+        if form_id is not None:
+            submissions = submissions.filter(form_id=form_id)
+        if team_id is not None:
+            submissions = submissions.filter(form__teams=team_id)
+        if submitted_after is not None:
+            submissions = submissions.filter(submitted_at__gte=submitted_after)
+        if submitted_before is not None:
+            submissions = submissions.filter(submitted_at__lt=submitted_before)
+
+        return (
+            submissions.order_by("submitted_at", "pk")
+            .values("id", "form_id", "submitted_at", "data", "signature")
+            .iterator(chunk_size=settings.FORM_SUBMISSION_EXPORT_CHUNK_SIZE)
+        )
+
+    @staticmethod
+    def _encode_cursor(submission: FormSubmission) -> str:
+        value = f"{submission.submitted_at.isoformat()}|{submission.pk}"
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        try:
+            submitted_at, pk = (
+                base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            )
+            return datetime.fromisoformat(submitted_at), int(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise FormServiceException(_("Invalid cursor."))
+
+    @classmethod
+    def retrieve_submissions_since(
+        cls, user: AbstractUser, cursor: str = None, limit: int = 100, wait: float = 0
+    ) -> dict:
+        """
+        retrieve the submissions that arrived after a cursor, oldest first
+        :param user: the user calling the service
+        :param cursor: cursor returned by the previous call, None to start at the beginning
+        :param limit: maximum number of submissions to return
+        :param wait: seconds to wait for new submissions if there are none yet, capped
+        by FORM_SUBMISSION_SYNC_MAX_WAIT
+        :return: dict with the submissions, the cursor for the next call, whether
+        there are more submissions after them and the seconds the client should wait
+        before asking again
+        """
+        limit = max(1, min(limit, settings.FORM_SUBMISSION_SYNC_MAX_LIMIT))
+        wait = max(0, min(wait, settings.FORM_SUBMISSION_SYNC_MAX_WAIT))
+
+        # submissions are ordered by (submitted_at, id), which is covered by the
+        # (form, submitted_at, id) index for every accessible form
+        submissions = FormSubmission.objects.filter(
+            form__in=list(
+                cls.retrieve_accessible_forms(user)
+                .values_list("pk", flat=True)
+                .distinct()
+            )
+        ).order_by("submitted_at", "pk")
+        if cursor:
+            submitted_at, pk = cls._decode_cursor(cursor)
+            submissions = submissions.filter(
+                Q(submitted_at__gt=submitted_at)
+                | Q(submitted_at=submitted_at, pk__gt=pk)
+            )
+
+        # a waiting request holds its worker thread, so the wait is off unless
+        # FORM_SUBMISSION_SYNC_MAX_WAIT allows it; otherwise clients poll again after
+        # poll_interval
+        deadline = time.monotonic() + wait
+        while True:
+            # leave out the most recent submissions, a submission that got its
+            # timestamp earlier might not have been committed yet
+            settled = timezone.now() - timedelta(
+                seconds=settings.FORM_SUBMISSION_SYNC_LAG
+            )
+            page = list(submissions.filter(submitted_at__lte=settled)[: limit + 1])
+            remaining = deadline - time.monotonic()
+            if page or remaining <= 0:
+                break
+            time.sleep(min(settings.FORM_SUBMISSION_SYNC_WAIT_STEP, remaining))
+
+        has_more = len(page) > limit
+        page = page[:limit]
+        return {
+            "submissions": page,
+            "cursor": cls._encode_cursor(page[-1]) if page else cursor,
+            "has_more": has_more,
+            "poll_interval": 0
+            if has_more
+            else settings.FORM_SUBMISSION_SYNC_POLL_INTERVAL,
+        }
@@ -0,0 +1,358 @@
+import multiprocessing
+from abc import ABC, abstractmethod
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import List
+
+import pgpy
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+
+from forms.models import SignatureKey
+from forms.services.signing_worker import init_signing_worker, sign_batch
+
+
+class SignatureKeyStoreException(Exception):
+    pass
+
+
+class LoadedSignatureKey:
+    """an active signature key that has been parsed and is unlocked on first use"""
+
+    def __init__(self, pk: int, private_key: str, subkey_id: str):
+        self.pk = pk
+        self.private_key = private_key
+        self.subkey_id = subkey_id
+
+        self.key = pgpy.PGPKey()
+        self.key.parse(private_key)
+        self.public_key = str(self.key.pubkey)
+        self.subkey = self.key.subkeys[self.subkey_id]
+
+        self._unlocked = None
+        self._unlock_lock = threading.Lock()
+
+    def _unlock(self):
+        # enter the unlock context manually and keep it open for the lifetime of
+        # this object, so the S2K derivation and decryption only run once. The
+        # unlocked key material gets wiped when the context is garbage collected.
+        with self._unlock_lock:
+            if self._unlocked is None:
+                unlocked = self.subkey.unlock(settings.SECRET_KEY)
+                unlocked.__enter__()
+                self._unlocked = unlocked
+
+    def sign(self, content: str) -> pgpy.PGPSignature:
+        """
+        sign a string with the unlocked subkey
+        :param content: the content that should be signed
+        :return: the signature object
+        """
+        if self._unlocked is None:
+            self._unlock()
+        return self.subkey.sign(content)
+
+
+class SignatureKeyStore:
+    """
+    process wide holder of the unlocked signing subkey used by FormService.submit
+
+    The key is loaded lazily on first use and reloaded whenever the id of the
+    active secondary SignatureKey changes. The id lookup is cheap compared to the
+    key unlock and also catches keys that were rotated by another process
+    (e.g. the create_signature_key command), which doesn't fire any signals here.
+    """
+
+    _lock = threading.Lock()
+    _loaded = None
+    hits = 0
+    misses = 0
+    reloads = 0
+
+    @classmethod
+    def _active_key_id(cls):
+        # we currently load the primary key b/c of a bug in pgpy
+        return (
+            SignatureKey.objects.filter(
+                active=True, key_type=SignatureKey.SignatureKeyType.SECONDARY
+            )
+            .values_list("pk", flat=True)
+            .first()
+        )
+
+    @classmethod
+    def get(cls) -> LoadedSignatureKey:
+        """
+        get the unlocked active signature key
+        :return: the loaded signature key
+        """
+        key_id = cls._active_key_id()
+        if key_id is None:
+            cls.invalidate()
+            raise SignatureKeyStoreException(
+                _("Couldn't sign form because there are no signing keys available.")
+            )
+
+        loaded = cls._loaded
+        if loaded is not None and loaded.pk == key_id:
+            with cls._lock:
+                cls.hits += 1
+            return loaded
+
+        with cls._lock:
+            # another thread might have loaded the key while we were waiting
+            if cls._loaded is not None and cls._loaded.pk == key_id:
+                cls.hits += 1
+                return cls._loaded
+
+            cls.misses += 1
+            try:
+                signature_key = SignatureKey.objects.get(pk=key_id)
+            except SignatureKey.DoesNotExist:
+                raise SignatureKeyStoreException(
+                    _("Couldn't sign form because there are no signing keys available.")
+                )
+
+            if cls.misses > 1:
+                cls.reloads += 1
+            # requests that are still signing keep their reference to the old key
+            cls._loaded = LoadedSignatureKey(
+                signature_key.pk, signature_key.private_key, signature_key.subkey_id
+            )
+            return cls._loaded
+
+    @classmethod
+    def invalidate(cls):
+        """drop the loaded key, the next call to get() will load the active key again"""
+        with cls._lock:
+            cls._loaded = None
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        counters of the key store
+        :return: dict with the hit, miss and reload counters
+        """
+        return {"hits": cls.hits, "misses": cls.misses, "reloads": cls.reloads}
+
+
+class SigningBackend(ABC):
+    """
+    signs the content of submitted forms, configured with FORM_SIGNING_BACKEND
+    """
+
+    def sign(
+        self, signature_key: LoadedSignatureKey, content: str
+    ) -> pgpy.PGPSignature:
+        """
+        sign a single content
+        :param signature_key: the active signature key
+        :param content: the content that should be signed
+        :return: the signature object
+        """
+        return self.sign_many(signature_key, [content])[0]
+
+    @abstractmethod
+    def sign_many(
+        self, signature_key: LoadedSignatureKey, contents: List[str]
+    ) -> List[pgpy.PGPSignature]:
+        """
+        sign a list of contents
+        :param signature_key: the active signature key
+        :param contents: the contents that should be signed
+        :return: the signature objects in the same order as the contents
+        """
+
+
+class InlineSigningBackend(SigningBackend):
+    """signs in the calling thread"""
+
+    def sign_many(
+        self, signature_key: LoadedSignatureKey, contents: List[str]
+    ) -> List[pgpy.PGPSignature]:
+        return [signature_key.sign(content) for content in contents]
+
+
+class ProcessPoolSigningBackend(SigningBackend):
+    """
+    signs in a pool of worker processes that keep the signature key unlocked
+
+    Signing RSA keys is CPU bound and holds the GIL, so signing inline serialises
+    all request threads of a worker. Requests arriving within the batch window
+    are collected and split across the worker processes.
+
+    The workers are forked from a forkserver instead of the (threaded) web worker
+    and get the armored key through their initializer. A pool whose worker died is
+    dropped and started again on the next batch.
+    """
+
+    def __init__(
+        self,
+        workers: int = None,
+        batch_window: float = None,
+        batch_size: int = None,
+        timeout: float = None,
+    ):
+        self.workers = workers or getattr(settings, "FORM_SIGNING_WORKERS", 4)
+        self.batch_window = (
+            batch_window
+            if batch_window is not None
+            else getattr(settings, "FORM_SIGNING_BATCH_WINDOW", 0.005)
+        )
+        self.batch_size = batch_size or getattr(settings, "FORM_SIGNING_BATCH_SIZE", 8)
+        self.timeout = timeout or getattr(settings, "FORM_SIGNING_TIMEOUT", 30)
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_key_id = None
+        self._dispatcher = None
+
+    def _get_pool(self, signature_key: LoadedSignatureKey) -> ProcessPoolExecutor:
+        """get the worker pool for the given key, replacing pools of rotated keys"""
+        with self._lock:
+            if self._pool is None or self._pool_key_id != signature_key.pk:
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                # forking a process running request threads is unsafe, the workers
+                # are forked from a single threaded server that preloaded pgpy
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(["forms.services.signing_worker"])
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=init_signing_worker,
+                    initargs=(
+                        signature_key.private_key,
+                        signature_key.subkey_id,
+                        settings.SECRET_KEY,
+                    ),
+                )
+                self._pool_key_id = signature_key.pk
+            return self._pool
+
+    def _drop_pool(self, pool: ProcessPoolExecutor):
+        """drop a broken pool, the next batch starts a new one"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+                self._pool_key_id = None
+        pool.shutdown(wait=False)
+
+    def _ensure_dispatcher(self):
+        with self._lock:
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch, name="form-signing-dispatcher", daemon=True
+                )
+                self._dispatcher.start()
+
+    def _dispatch(self):
+        """collect the requests of one batch window and hand them to the pool"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # a key rotation might happen in the middle of a batch window
+            by_key = {}
+            for signature_key, contents, future in batch:
+                by_key.setdefault(signature_key.pk, (signature_key, []))[1].append(
+                    (contents, future)
+                )
+            for signature_key, requests in by_key.values():
+                self._submit(signature_key, requests)
+
+    def _submit_chunks(self, signature_key: LoadedSignatureKey, chunks: list):
+        pool = self._get_pool(signature_key)
+        try:
+            return pool, [pool.submit(sign_batch, chunk) for chunk in chunks]
+        except BrokenProcessPool:
+            # a worker died since the last batch, start over with a new pool
+            self._drop_pool(pool)
+            pool = self._get_pool(signature_key)
+            return pool, [pool.submit(sign_batch, chunk) for chunk in chunks]
+
+    def _submit(self, signature_key: LoadedSignatureKey, requests: list):
+        contents = [content for request, future in requests for content in request]
+        # spread the batch over the workers instead of signing it in one of them
+        chunk_size = -(-len(contents) // self.workers)
+        chunks = [
+            contents[i : i + chunk_size] for i in range(0, len(contents), chunk_size)
+        ]
+
+        def fail(e):
+            for request, future in requests:
+                future.set_exception(e)
+
+        try:
+            pool, pool_futures = self._submit_chunks(signature_key, chunks)
+        except Exception as e:
+            fail(e)
+            return
+
+        pending = [len(pool_futures)]
+        pending_lock = threading.Lock()
+
+        def resolve(pool_future):
+            with pending_lock:
+                pending[0] -= 1
+                if pending[0]:
+                    return
+            try:
+                signatures = [
+                    signature
+                    for pool_future in pool_futures
+                    for signature in pool_future.result()
+                ]
+            except BrokenProcessPool as e:
+                self._drop_pool(pool)
+                fail(e)
+                return
+            except Exception as e:
+                fail(e)
+                return
+            offset = 0
+            for request, future in requests:
+                future.set_result(signatures[offset : offset + len(request)])
+                offset += len(request)
+
+        for pool_future in pool_futures:
+            pool_future.add_done_callback(resolve)
+
+    def sign_many(
+        self, signature_key: LoadedSignatureKey, contents: List[str]
+    ) -> List[pgpy.PGPSignature]:
+        self._ensure_dispatcher()
+        future = Future()
+        self._queue.put((signature_key, list(contents), future))
+        return [
+            pgpy.PGPSignature.from_blob(signature)
+            for signature in future.result(timeout=self.timeout)
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_signing_backend() -> SigningBackend:
+    """
+    get the configured signing backend of this process
+    :return: the SigningBackend instance
+    """
+    backend = getattr(
+        settings,
+        "FORM_SIGNING_BACKEND",
+        "forms.services.signing.InlineSigningBackend",
+    )
+    return import_string(backend)()
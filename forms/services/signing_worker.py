@@ -0,0 +1,43 @@
+"""
+entry points of the signing worker processes of ProcessPoolSigningBackend
+
+The workers are started by a forkserver and only import this module, so it must
+not import django settings or models.
+"""
+from typing import List
+
+import pgpy
+
+# the key, subkey and open unlock context of a signing worker process, set by
+# init_signing_worker; the subkey only keeps a weak reference to its key and is
+# locked again when the unlock context is garbage collected
+_worker_key = None
+_worker_subkey = None
+_worker_unlocked = None
+
+
+def init_signing_worker(private_key: str, subkey_id: str, passphrase: str):
+    """
+    parse and unlock the signature key once per worker process
+    :param private_key: the armored private signature key
+    :param subkey_id: the id of the signing subkey
+    :param passphrase: the passphrase of the subkey
+    """
+    global _worker_key, _worker_subkey, _worker_unlocked
+    key = pgpy.PGPKey()
+    key.parse(private_key)
+    subkey = key.subkeys[subkey_id]
+    # keep the unlock context open for the lifetime of the worker, see
+    # LoadedSignatureKey._unlock
+    unlocked = subkey.unlock(passphrase)
+    unlocked.__enter__()
+    _worker_key, _worker_subkey, _worker_unlocked = key, subkey, unlocked
+
+
+def sign_batch(contents: List[str]) -> List[str]:
+    """
+    sign contents with the key of this worker
+    :param contents: the contents that should be signed
+    :return: the armored signatures in the same order as the contents
+    """
+    return [str(_worker_subkey.sign(content)) for content in contents]
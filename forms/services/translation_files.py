@@ -0,0 +1,177 @@
+import json
+import re
+from typing import Dict, List, NamedTuple
+from defusedxml import DefusedXmlException, ElementTree
+
+
+class TranslationFileException(Exception):
+    pass
+
+
+class TranslationFile(NamedTuple):
+    """the strings of a parsed translation file"""
+
+    strings: Dict[str, str]
+    # the entries that couldn't be imported and why, reported back to the uploader
+    skipped: List[str]
+
+
+def _flatten(strings: dict, prefix: str = "") -> Dict[str, str]:
+    flat = {}
+    for key, value in strings.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, str):
+            flat[f"{prefix}{key}"] = value
+        else:
+            raise TranslationFileException(
+                f"The value of '{prefix}{key}' is no string."
+            )
+    return flat
+
+
+def parse_json(content: str) -> TranslationFile:
+    """
+    parse a json object of keys and values, nested objects are joined with dots,
+    e.g. {"form": {"title": "Titel"}} becomes {"form.title": "Titel"}
+    """
+    try:
+        strings = json.loads(content)
+    except json.JSONDecodeError:
+        raise TranslationFileException("Not a valid json file.")
+    if not isinstance(strings, dict):
+        raise TranslationFileException("The json file has to contain an object.")
+    return TranslationFile(_flatten(strings), [])
+
+
+def _collect(entries: List[tuple], skipped: List[str]) -> TranslationFile:
+    """
+    build the strings of a file from its (key, value) entries, keys used by more
+    than one entry are ambiguous and left out
+    """
+    strings, duplicates = {}, set()
+    for key, value in entries:
+        if key in strings:
+            duplicates.add(key)
+        strings[key] = value
+    for key in sorted(duplicates):
+        del strings[key]
+        skipped.append(f"'{key}' is used by more than one entry.")
+    return TranslationFile(strings, skipped)
+
+
+def parse_xliff(content: str) -> TranslationFile:
+    """
+    parse the units of a xliff 1.2 or 2.0 file, the key is the resname or id of a
+    unit, the value is its target (or its source if it has no target); the files are
+    uploaded by users, so entity declarations and external references are rejected
+    """
+    try:
+        root = ElementTree.fromstring(content)
+    except ElementTree.ParseError:
+        raise TranslationFileException("Not a valid xliff file.")
+    except DefusedXmlException:
+        raise TranslationFileException("Xliff files must not declare entities.")
+
+    entries, skipped = [], []
+    for element in root.iter():
+        # xliff 1.2 has trans-units, xliff 2.0 units with segments
+        if element.tag.rsplit("}", 1)[-1] not in ("trans-unit", "unit"):
+            continue
+        key = element.get("resname") or element.get("id")
+        texts = {
+            child.tag.rsplit("}", 1)[-1]: "".join(child.itertext())
+            for child in element.iter()
+            if child.tag.rsplit("}", 1)[-1] in ("source", "target")
+        }
+        value = texts.get("target", texts.get("source"))
+        if not key:
+            skipped.append("A unit without an id or resname.")
+        elif value is None:
+            skipped.append(f"'{key}' has no source or target.")
+        else:
+            entries.append((key, value))
+    return _collect(entries, skipped)
+
+
+_PO_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", '"': '"', "\\": "\\"}
+
+
+def _po_string(line: str) -> str:
+    if not (line.startswith('"') and line.endswith('"')):
+        raise TranslationFileException(f"Invalid po string: {line}")
+    return re.sub(
+        r"\\(.)", lambda m: _PO_ESCAPES.get(m.group(1), m.group(1)), line[1:-1]
+    )
+
+
+def parse_po(content: str) -> TranslationFile:
+    """
+    parse a gettext po file, the msgid is the key and the msgstr the value; entries
+    with a msgctxt are keyed by the context and the msgid joined with a dot, like
+    nested json keys. Untranslated, fuzzy and plural entries can't be imported and
+    are reported as skipped, the header is left out.
+    """
+    entries, skipped = [], []
+    entry, field, fuzzy = {}, None, False
+
+    def finish():
+        if not entry.get("msgid"):
+            # the header, or no entry at all
+            return
+        key = entry["msgid"]
+        if entry.get("msgctxt"):
+            key = f"{entry['msgctxt']}.{key}"
+        if "msgid_plural" in entry:
+            skipped.append(f"'{key}' has plural forms, which can't be imported.")
+        elif fuzzy:
+            skipped.append(f"'{key}' is marked as fuzzy.")
+        elif not entry.get("msgstr"):
+            skipped.append(f"'{key}' is not translated.")
+        else:
+            entries.append((key, entry["msgstr"]))
+
+    for line in content.splitlines() + [""]:
+        line = line.strip()
+        if not line:
+            finish()
+            entry, field, fuzzy = {}, None, False
+        elif line.startswith("#"):
+            fuzzy = fuzzy or (line.startswith("#,") and "fuzzy" in line)
+        elif line.startswith('"'):
+            if field is None:
+                raise TranslationFileException(f"Invalid po line: {line}")
+            entry[field] += _po_string(line)
+        else:
+            field, _, value = line.partition(" ")
+            if field in entry or (field == "msgctxt" and "msgid" in entry):
+                # a new entry without a blank line in between
+                finish()
+                entry, fuzzy = {}, False
+            entry[field] = _po_string(value.strip())
+    return _collect(entries, skipped)
+
+
+TRANSLATION_FILE_PARSERS = {
+    "json": parse_json,
+    "xliff": parse_xliff,
+    "xlf": parse_xliff,
+    "po": parse_po,
+}
+
+
+def parse_translation_file(name: str, content: bytes) -> TranslationFile:
+    """
+    parse an uploaded translation file by its extension
+    :param name: the file name, ending in .json, .xliff, .xlf or .po
+    :param content: the content of the file, utf-8 encoded
+    :return: the translation keys and values, and the entries that were skipped
+    """
+    extension = name.rsplit(".", 1)[-1].lower()
+    if extension not in TRANSLATION_FILE_PARSERS:
+        raise TranslationFileException(f"Unsupported translation file {name}.")
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise TranslationFileException("The translation file has to be utf-8.")
+    return TRANSLATION_FILE_PARSERS[extension](text)
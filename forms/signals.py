@@ -1,8 +1,110 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 
-### Define your signals here.
-# EXAMPLE:
-# @receiver(post_save, sender=SomeModel)
-# def do_something_at_post_save(instance, ...):
-#     ...
+from forms.models import (
+    SignatureKey,
+    Form,
+    FormSchema,
+    FormTranslation,
+    TranslationKey,
+)
+from forms.services.forms import (
+    FormService,
+    FormSchemaService,
+    FormTranslationService,
+)
+from forms.services.signing import SignatureKeyStore
+from teams.models import Team, TeamCertificate
+
+
+@receiver(post_save, sender=SignatureKey)
+@receiver(post_delete, sender=SignatureKey)
+def invalidate_signature_key_store(sender, instance, **kwargs):
+    """an activated or removed signature key replaces the key loaded in this process"""
+    SignatureKeyStore.invalidate()
+
+
+@receiver(m2m_changed, sender=Form.teams.through)
+def rebuild_recipient_keys_on_teams_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """the receiving teams of a form changed"""
+    if action == "pre_clear" and reverse:
+        # remember the forms of the team, they are gone after the clear
+        instance._cleared_form_ids = list(instance.forms.values_list("pk", flat=True))
+        return
+
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        form_ids = [instance.pk]
+    elif action == "post_clear":
+        form_ids = getattr(instance, "_cleared_form_ids", [])
+    else:
+        form_ids = pk_set
+
+    for form_id in form_ids:
+        FormService.rebuild_recipient_keys(form_id)
+
+
+@receiver(post_save, sender=TeamCertificate)
+@receiver(post_delete, sender=TeamCertificate)
+def rebuild_recipient_keys_on_certificate_change(sender, instance, **kwargs):
+    """a certificate of a team has been added, activated, replaced or removed"""
+    for form_id in Form.objects.filter(teams=instance.team_id).values_list(
+        "pk", flat=True
+    ):
+        FormService.rebuild_recipient_keys(form_id)
+
+
+@receiver(pre_delete, sender=Team)
+def remember_forms_of_deleted_team(sender, instance, **kwargs):
+    instance._deleted_form_ids = list(instance.forms.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Team)
+def rebuild_recipient_keys_on_team_delete(sender, instance, **kwargs):
+    for form_id in getattr(instance, "_deleted_form_ids", []):
+        FormService.rebuild_recipient_keys(form_id)
+
+
+@receiver(post_save, sender=Form)
+@receiver(post_delete, sender=Form)
+def invalidate_form_bundle(sender, instance, **kwargs):
+    FormService.invalidate_form_bundle(instance.pk)
+    FormTranslationService.invalidate_translation_catalogs(instance.pk)
+
+
+@receiver(post_save, sender=FormSchema)
+@receiver(post_delete, sender=FormSchema)
+def compile_form_schema(sender, instance, **kwargs):
+    FormSchemaService.compile_form_schema(instance.form_id)
+
+
+@receiver(post_save, sender=FormSchema)
+@receiver(post_delete, sender=FormSchema)
+@receiver(post_save, sender=FormTranslation)
+@receiver(post_delete, sender=FormTranslation)
+def invalidate_form_bundle_on_form_part_change(sender, instance, **kwargs):
+    FormService.invalidate_form_bundle(instance.form_id)
+
+
+@receiver(post_save, sender=FormTranslation)
+@receiver(post_delete, sender=FormTranslation)
+def invalidate_translation_catalogs(sender, instance, **kwargs):
+    FormTranslationService.invalidate_translation_catalogs(instance.form_id)
+
+
+@receiver(post_save, sender=TranslationKey)
+@receiver(post_delete, sender=TranslationKey)
+def invalidate_form_bundle_on_translation_key_change(sender, instance, **kwargs):
+    # the translation is already gone if the key is deleted with it
+    form_id = (
+        FormTranslation.objects.filter(pk=instance.translation_id)
+        .values_list("form_id", flat=True)
+        .first()
+    )
+    if form_id is not None:
+        FormService.invalidate_form_bundle(form_id)
+        FormTranslationService.invalidate_translation_catalogs(form_id)
@@ -0,0 +1,153 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import TestCase, RequestFactory
+from django.test.utils import CaptureQueriesContext
+from serious_django_permissions.management.commands import create_groups
+
+from forms.models import (
+    Form,
+    FormSchema,
+    FormSubmission,
+    FormTranslation,
+    TranslationKey,
+)
+from settings.default_groups import AdministrativeStaffGroup, InstanceAdminGroup
+from settings.schema import schema
+from teams.services import TeamService, TeamMembershipService
+
+ALL_FORMS_QUERY = """
+query {
+  allForms {
+    edges {
+      node {
+        name
+        schemas {
+          edges {
+            node {
+              key
+              form {
+                name
+              }
+            }
+          }
+        }
+        translations {
+          edges {
+            node {
+              language
+              translationKeys {
+                edges {
+                  node {
+                    key
+                    value
+                  }
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+ALL_FORM_SUBMISSIONS_QUERY = """
+query {
+  allFormSubmissions {
+    edges {
+      node {
+        id
+        submittedAt
+        form {
+          name
+        }
+      }
+    }
+  }
+}
+"""
+
+
+class FormSchemaTest(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().post("/graphql")
+        self.request.user = AnonymousUser()
+
+    def create_form(self, name):
+        form = Form.objects.create(
+            name=name,
+            description="Doggo",
+            js_code="var foo;",
+            xml_code="<xml></xml>",
+            active=True,
+        )
+        FormSchema.objects.create(form=form, key="schema", schema="{}")
+        FormSchema.objects.create(form=form, key="ui", schema="{}")
+        translation = FormTranslation.objects.create(
+            form=form, language="de", region="DE", active=True
+        )
+        TranslationKey.objects.create(translation=translation, key="a", value="b")
+        return form
+
+    def test_all_forms_query_count(self):
+        for name in ["Hundiformular", "Katzenformular", "Vogelformular"]:
+            self.create_form(name)
+
+        # forms (count and rows), schemas, translations and translation keys
+        with self.assertNumQueries(5):
+            result = schema.execute(ALL_FORMS_QUERY, context_value=self.request)
+
+        self.assertIsNone(result.errors)
+        forms = result.data["allForms"]["edges"]
+        self.assertEqual(len(forms), 3)
+        for form in forms:
+            schemas = form["node"]["schemas"]["edges"]
+            self.assertEqual([s["node"]["key"] for s in schemas], ["schema", "ui"])
+            self.assertEqual(schemas[0]["node"]["form"]["name"], form["node"]["name"])
+            translation = form["node"]["translations"]["edges"][0]["node"]
+            self.assertEqual(len(translation["translationKeys"]["edges"]), 1)
+
+    def test_all_form_submissions_query_count(self):
+        create_groups.Command().handle()
+        user = get_user_model().objects.create(username="adminstaff")
+        admin = get_user_model().objects.create(username="instanceadmin")
+        user.groups.add(AdministrativeStaffGroup)
+        admin.groups.add(InstanceAdminGroup)
+        team = TeamService.create(admin, "Hunditeam", {})
+        TeamMembershipService.add_member(admin, team.pk, {}, user.pk)
+        self.request.user = user
+
+        forms = [self.create_form(name) for name in ["Hundiformular", "Katzen"]]
+        for form in forms:
+            form.teams.add(team)
+            FormSubmission.objects.create(form=form, data="data", signature="sig")
+
+        def execute():
+            with CaptureQueriesContext(connection) as queries:
+                result = schema.execute(
+                    ALL_FORM_SUBMISSIONS_QUERY, context_value=self.request
+                )
+            self.assertIsNone(result.errors)
+            return result.data["allFormSubmissions"]["edges"], queries
+
+        # the first query also loads the permissions of the user
+        execute()
+        submissions, queries = execute()
+        self.assertEqual(len(submissions), 2)
+        self.assertEqual(
+            {s["node"]["form"]["name"] for s in submissions},
+            {"Hundiformular", "Katzen"},
+        )
+        # the form is joined and the submission data isn't loaded
+        submission_query = queries.captured_queries[-1]["sql"]
+        self.assertIn("forms_form", submission_query)
+        self.assertNotIn('"forms_formsubmission"."data"', submission_query)
+
+        for form in forms:
+            FormSubmission.objects.create(form=form, data="data", signature="sig")
+        submissions, more_queries = execute()
+        self.assertEqual(len(submissions), 4)
+        self.assertEqual(len(more_queries), len(queries))
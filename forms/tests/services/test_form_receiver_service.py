@@ -1,11 +1,15 @@
+import io
 import json
+import tarfile
+import time
 import pgpy
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.exceptions import PermissionDenied
-from django.test import TestCase, RequestFactory
+from django.test import TestCase, RequestFactory, override_settings
 from django.urls import reverse
 from django.conf import settings
+from graphql_relay import to_global_id
 from serious_django_permissions.management.commands import create_groups
 
 from forms.models import Form, SignatureKey
@@ -19,6 +23,7 @@ from teams.models import EncryptionKey
 from teams.services import TeamService, TeamMembershipService
 from settings.default_groups import AdministrativeStaffGroup, InstanceAdminGroup
 from teams.tests.services.mock import create_mock_cert
+from forms.views import export_submissions
 from ...management.commands import create_signature_key
 from ..utils import generate_test_keypair
 
@@ -106,3 +111,96 @@ class FormReceiverServiceTest(TestCase):
         self.assertEqual(
             FormReceiverService.retrieve_submitted_forms(self.user).count(), 3
         )
+
+    @override_settings(FORM_SUBMISSION_SYNC_LAG=0)
+    def test_retrieve_submissions_since(self):
+        feed = FormReceiverService.retrieve_submissions_since(self.user)
+        self.assertEqual([s.data for s in feed["submissions"]], ["helo"])
+        self.assertFalse(feed["has_more"])
+
+        # nothing new, the cursor stays the same
+        empty = FormReceiverService.retrieve_submissions_since(
+            self.user, cursor=feed["cursor"]
+        )
+        self.assertEqual(empty["submissions"], [])
+        self.assertEqual(empty["cursor"], feed["cursor"])
+        self.assertEqual(
+            empty["poll_interval"], settings.FORM_SUBMISSION_SYNC_POLL_INTERVAL
+        )
+
+        for content in ["a", "b", "c"]:
+            FormService.submit(form_id=self.form.id, content=content)
+        FormService.submit(form_id=self.second_form.id, content="not accessible")
+
+        page = FormReceiverService.retrieve_submissions_since(
+            self.user, cursor=feed["cursor"], limit=2
+        )
+        self.assertEqual([s.data for s in page["submissions"]], ["a", "b"])
+        self.assertTrue(page["has_more"])
+        self.assertEqual(page["poll_interval"], 0)
+        page = FormReceiverService.retrieve_submissions_since(
+            self.user, cursor=page["cursor"], limit=2
+        )
+        self.assertEqual([s.data for s in page["submissions"]], ["c"])
+        self.assertFalse(page["has_more"])
+
+        with self.assertRaises(FormServiceException):
+            FormReceiverService.retrieve_submissions_since(self.user, cursor="nope")
+
+    @override_settings(FORM_SUBMISSION_SYNC_LAG=0, FORM_SUBMISSION_SYNC_WAIT_STEP=0.01)
+    def test_retrieve_submissions_since_wait(self):
+        feed = FormReceiverService.retrieve_submissions_since(self.user)
+
+        # long polling is off by default
+        started = time.monotonic()
+        FormReceiverService.retrieve_submissions_since(
+            self.user, cursor=feed["cursor"], wait=10
+        )
+        self.assertLess(time.monotonic() - started, 1)
+
+        with override_settings(FORM_SUBMISSION_SYNC_MAX_WAIT=0.1):
+            started = time.monotonic()
+            empty = FormReceiverService.retrieve_submissions_since(
+                self.user, cursor=feed["cursor"], wait=10
+            )
+            self.assertEqual(empty["submissions"], [])
+            self.assertGreaterEqual(time.monotonic() - started, 0.1)
+            self.assertLess(time.monotonic() - started, 1)
+
+    def test_export_submissions(self):
+        FormService.submit(form_id=self.form.id, content="second")
+        request = RequestFactory().get(
+            "/", {"form": to_global_id("FormNode", self.form.pk)}
+        )
+        request.user = self.user
+
+        response = export_submissions(request)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)["data"] for line in lines], ["helo", "second"]
+        )
+
+        request = RequestFactory().get(
+            "/",
+            {
+                "format": "tar",
+                "team": to_global_id("InternalTeamNode", self.group.pk),
+                "submitted_after": self.form.formsubmission_set.last().submitted_at.isoformat(),
+            },
+        )
+        request.user = self.user
+        response = export_submissions(request)
+        archive = tarfile.open(fileobj=io.BytesIO(b"".join(response.streaming_content)))
+        submission = self.form.formsubmission_set.last()
+        self.assertEqual(
+            sorted(archive.getnames()),
+            [f"{submission.pk}.asc", f"{submission.pk}.json", f"{submission.pk}.sig"],
+        )
+        self.assertEqual(
+            archive.extractfile(f"{submission.pk}.asc").read().decode(), "second"
+        )
+
+        # users without the permission can't export
+        request.user = get_user_model().objects.create(username="nobody")
+        self.assertEqual(export_submissions(request).status_code, 403)
@@ -83,3 +83,20 @@ class FormSchemaServiceTest(TestCase):
 
         self.assertEqual(schema.pk, schema_update.pk)
         self.assertEqual(schema_update.schema, '{"allo": true}')
+
+    def test_compiled_schema(self):
+        FormSchemaService.create_form_schema(
+            self.admin, "sction", self.form.id, '{"acab": true}'
+        )
+        schema = FormSchemaService.create_form_schema(
+            self.admin, "other", self.form.id, '{"list": [1, 2]}'
+        )
+        FormSchemaService.update_form_schema(self.admin, schema.pk, '{"list": []}')
+
+        self.form.refresh_from_db()
+        self.assertEqual(self.form.schema_version, 3)
+        self.assertEqual(
+            json.loads(self.form.compiled_schema),
+            {"sction": {"acab": True}, "other": {"list": []}},
+        )
+        self.assertEqual(self.form.generated_schema["other"], {"list": []})
@@ -1,24 +1,39 @@
 import json
+from unittest import mock
+
 import pgpy
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.exceptions import PermissionDenied
-from django.test import TestCase, RequestFactory
+from django.test import TestCase, RequestFactory, override_settings
 from django.urls import reverse
 from django.conf import settings
+from django.db import IntegrityError
+from django.http import Http404
+from graphql_relay import to_global_id
 from serious_django_permissions.management.commands import create_groups
 
-from forms.models import Form, SignatureKey
+from forms.models import (
+    Form,
+    FormSubmission,
+    SignatureKey,
+    FormSchema,
+    FormTranslation,
+    TranslationKey,
+)
 from forms.services.forms import (
     FormService,
     FormServiceException,
     FormReceiverService,
     FormSchemaService,
+    FormTranslationService,
 )
-from teams.models import EncryptionKey
+from teams.models import EncryptionKey, TeamStatus
 from teams.services import TeamService, TeamMembershipService
 from settings.default_groups import AdministrativeStaffGroup, InstanceAdminGroup
 from teams.tests.services.mock import create_mock_cert
+from forms.checks import check_shared_cache
+from forms.views import form_bundle, translation_catalog
 from ...management.commands import create_signature_key
 from ..utils import generate_test_keypair
 
@@ -77,6 +92,35 @@ class FormServiceTest(TestCase):
         keys = FormService.retrieve_public_keys_for_form(self.form.id)
         self.assertEqual(len(keys), 1)
 
+    def test_recipient_keys_follow_teams_and_certificates(self):
+        keys = FormService.retrieve_public_keys_for_form(self.form.id)
+        self.assertEqual(len(keys), 1)
+        self.assertEqual(json.loads(keys[0])["kty"], "RSA")
+
+        # a team without an active certificate can't receive submissions
+        second_team = TeamService.create(self.admin, "Kattiteam", {})
+        self.form.teams.add(second_team)
+        self.assertEqual(
+            len(FormService.retrieve_public_keys_for_form(self.form.id)), 1
+        )
+
+        create_mock_cert(second_team)
+        self.assertEqual(
+            len(FormService.retrieve_public_keys_for_form(self.form.id)), 2
+        )
+
+        certificate = second_team.certificates.get()
+        certificate.status = TeamStatus.WAITING_FOR_CERTIFICATE
+        certificate.save()
+        self.assertEqual(
+            len(FormService.retrieve_public_keys_for_form(self.form.id)), 1
+        )
+
+        self.group.forms.clear()
+        self.assertEqual(
+            len(FormService.retrieve_public_keys_for_form(self.form.id)), 0
+        )
+
     def test_retrieve_form(self):
         # check form is retrieveable
         form = FormService.retrieve_form(self.form.id)
@@ -111,7 +155,8 @@ class FormServiceTest(TestCase):
             ).public_key
         )
 
-        self.assertEqual(bool(pub.verify(result["content"], result["signature"])), True)
+        signature = pgpy.PGPSignature.from_blob(result["signature"])
+        self.assertEqual(bool(pub.verify(result["content"], signature)), True)
         signed_content = json.loads(result["content"])
         self.assertEqual(signed_content["form_data"], "helo")
         self.assertEqual(len(signed_content["public_keys_recipients"]), 1)
@@ -126,6 +171,39 @@ class FormServiceTest(TestCase):
             "BEGIN PGP PRIVATE KEY BLOCK", signed_content["public_key_server"]
         )
 
+    def test_submit_form_retry(self):
+        create_signature_key.Command().handle()
+        result = FormService.submit(self.form.id, "helo", idempotency_key="abc")
+
+        # the retry gets the stored receipt, nothing is signed again
+        with self.assertNumQueries(2):
+            retry = FormService.submit(self.form.id, "helo", idempotency_key="abc")
+        self.assertEqual(retry["content"], result["content"])
+        self.assertEqual(retry["signature"], result["signature"])
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
+        with self.assertRaises(FormServiceException):
+            FormService.submit(self.form.id, "other", idempotency_key="abc")
+
+        # without a key the submission can't be replayed, nothing is kept for it
+        FormService.submit(self.form.id, "helo")
+        self.assertEqual(FormSubmission.objects.latest("pk").signed_fields, "")
+        with override_settings(FORM_SUBMISSION_DEDUPLICATE_CONTENT=True):
+            result = FormService.submit(self.form.id, "hello")
+            self.assertEqual(FormSubmission.objects.count(), 3)
+            retry = FormService.submit(self.form.id, "hello")
+            self.assertEqual(retry, result)
+            self.assertEqual(FormSubmission.objects.count(), 3)
+
+    def test_submit_form_integrity_error(self):
+        create_signature_key.Command().handle()
+        # only conflicts of the idempotency key are answered with a receipt
+        with mock.patch.object(
+            FormSubmission.objects, "create", side_effect=IntegrityError
+        ):
+            with self.assertRaises(IntegrityError):
+                FormService.submit(self.form.id, "helo")
+
     def test_form_creation(self):
         form = FormService.create_form_(self.admin, "A form", "Hello")
         self.assertEqual(form.description, "Hello")
@@ -180,3 +258,88 @@ class FormServiceTest(TestCase):
 
         with self.assertRaises(PermissionError):
             form = FormService.update_form_teams(self.user, form.pk, [grp.pk])
+
+    def test_form_bundle(self):
+        FormSchema.objects.create(form=self.form, key="main", schema='{"a": 1}')
+        translation = FormTranslation.objects.create(
+            form=self.form, language="de", region="DE", active=True
+        )
+        TranslationKey.objects.create(translation=translation, key="a", value="b")
+
+        form_id = to_global_id("FormNode", self.form.pk)
+        response = form_bundle(RequestFactory().get("/"), form_id)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age", response["Cache-Control"])
+        bundle = json.loads(response.content)
+        # the stored json is inserted as is, the result is the same
+        self.assertEqual(response.content.decode(), json.dumps(bundle, sort_keys=True))
+        self.assertEqual(bundle["schema"], {"main": {"a": 1}})
+        self.assertEqual(bundle["translations"], {"de": {"a": "b"}})
+        self.assertEqual(len(bundle["recipient_keys"]), 1)
+
+        # cached bundles don't touch the database
+        request = RequestFactory().get("/", HTTP_IF_NONE_MATCH=response["ETag"])
+        with self.assertNumQueries(0):
+            self.assertEqual(form_bundle(request, form_id).status_code, 304)
+
+        TranslationKey.objects.filter(translation=translation).get().delete()
+        request = RequestFactory().get("/", HTTP_IF_NONE_MATCH=response["ETag"])
+        response = form_bundle(request, form_id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["translations"], {"de": {}})
+
+        self.form.active = False
+        self.form.save()
+        with self.assertRaises(Http404):
+            form_bundle(RequestFactory().get("/"), form_id)
+
+    def test_translation_catalog(self):
+        for language, region, keys in [
+            ("en", "US", {"title": "Form", "submit": "Submit", "cancel": "Cancel"}),
+            ("de", "DE", {"title": "Formular", "submit": "Absenden"}),
+            ("de", "AT", {"title": "Formular (AT)"}),
+        ]:
+            translation = FormTranslation.objects.create(
+                form=self.form, language=language, region=region, active=True
+            )
+            for key, value in keys.items():
+                TranslationKey.objects.create(
+                    translation=translation, key=key, value=value
+                )
+
+        form_id = to_global_id("FormNode", self.form.pk)
+        response = translation_catalog(RequestFactory().get("/"), form_id, "de-AT")
+        self.assertEqual(
+            json.loads(response.content),
+            {"title": "Formular (AT)", "submit": "Absenden", "cancel": "Cancel"},
+        )
+
+        # the version and the catalog are read from the cache at once
+        request = RequestFactory().get("/", HTTP_IF_NONE_MATCH=response["ETag"])
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                translation_catalog(request, form_id, "de-AT").status_code, 304
+            )
+
+        FormTranslationService.update_translation_string(
+            self.admin, translation.pk, "submit", "Abschicken"
+        )
+        request = RequestFactory().get("/", HTTP_IF_NONE_MATCH=response["ETag"])
+        response = translation_catalog(request, form_id, "de-AT")
+        self.assertEqual(json.loads(response.content)["submit"], "Abschicken")
+
+        with self.assertRaises(Http404):
+            translation_catalog(RequestFactory().get("/"), form_id, "not a locale")
+        # only configured languages get a catalog
+        with self.assertRaises(Http404):
+            translation_catalog(RequestFactory().get("/"), form_id, "zz-QQ")
+        response = translation_catalog(RequestFactory().get("/"), form_id, "de")
+        self.assertEqual(json.loads(response.content)["title"], "Formular")
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_local_cache_is_reported(self):
+        self.assertEqual(
+            [warning.id for warning in check_shared_cache(None)], ["forms.W001"]
+        )
@@ -3,12 +3,14 @@ import pgpy
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.exceptions import PermissionDenied
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
 from django.test import TestCase, RequestFactory
 from django.urls import reverse
 from django.conf import settings
 from serious_django_permissions.management.commands import create_groups
 
-from forms.models import Form, SignatureKey, FormSchema
+from forms.models import Form, SignatureKey, FormSchema, TranslationKey
 from forms.services.forms import (
     FormService,
     FormServiceException,
@@ -94,3 +96,160 @@ class FormSchemaServiceTest(TestCase):
         )
 
         self.assertEqual(translated_key.value, "Hey there!")
+
+    def test_translation_key_is_unique(self):
+        translation = FormTranslationService.create_form_translation(
+            self.user, form_id=self.form.id, language="en", region="US"
+        )
+        first = FormTranslationService.update_translation_string(
+            self.user, translation.pk, "a.greeting", "Hey there!"
+        )
+        second = FormTranslationService.update_translation_string(
+            self.user, translation.pk, "a.greeting", "Hello!"
+        )
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(second.value, "Hello!")
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            TranslationKey.objects.create(
+                translation=translation, key="a.greeting", value="Hi!"
+            )
+
+    def test_update_translation_strings(self):
+        translation = FormTranslationService.create_form_translation(
+            self.user, form_id=self.form.id, language="en", region="US"
+        )
+        FormTranslationService.update_translation_string(
+            self.user, translation.pk, "a.greeting", "Hey there!"
+        )
+        FormTranslationService.update_translation_string(
+            self.user, translation.pk, "a.bye", "Bye!"
+        )
+
+        result = FormTranslationService.update_translation_strings(
+            self.user,
+            translation.pk,
+            {"a.greeting": "Hello!", "a.bye": "Bye!", "a.thanks": "Thanks!"},
+        )
+        self.assertEqual(result, {"created": 1, "updated": 1, "unchanged": 1})
+        self.assertEqual(
+            dict(translation.translation_keys.values_list("key", "value")),
+            {"a.greeting": "Hello!", "a.bye": "Bye!", "a.thanks": "Thanks!"},
+        )
+
+    def test_import_translation_file(self):
+        translation = FormTranslationService.create_form_translation(
+            self.user, form_id=self.form.id, language="en", region="US"
+        )
+        files = {
+            "en.json": b'{"a": {"greeting": "Hello!"}}',
+            "en.po": b"""msgid ""
+msgstr "Language: en\\n"
+
+#, fuzzy
+msgid "a.bye"
+msgstr "Bye!"
+
+msgid "a.greeting"
+msgstr ""
+"Hello "
+"\\"you\\"!"
+""",
+            "en.xlf": b"""<?xml version="1.0"?>
+<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2">
+  <file source-language="de" target-language="en" datatype="plaintext">
+    <body>
+      <trans-unit id="a.greeting"><source>Hallo!</source><target>Hello!</target></trans-unit>
+    </body>
+  </file>
+</xliff>""",
+        }
+        values = {}
+        for name, content in files.items():
+            FormTranslationService.import_translation_file(
+                self.user, translation.pk, SimpleUploadedFile(name, content)
+            )
+            values[name] = translation.translation_keys.get(key="a.greeting").value
+        self.assertEqual(
+            values,
+            {"en.json": "Hello!", "en.po": 'Hello "you"!', "en.xlf": "Hello!"},
+        )
+        self.assertFalse(translation.translation_keys.filter(key="a.bye").exists())
+
+        with self.assertRaises(FormServiceException):
+            FormTranslationService.import_translation_file(
+                self.user, translation.pk, SimpleUploadedFile("en.txt", b"")
+            )
+
+        # entity expansion ("billion laughs")
+        bomb = b"""<?xml version="1.0"?>
+<!DOCTYPE xliff [<!ENTITY a "aaaaaaaaaa"><!ENTITY b "&a;&a;&a;&a;&a;&a;&a;&a;">]>
+<xliff version="1.2"><file><body>
+<trans-unit id="a.greeting"><source>&b;</source></trans-unit>
+</body></file></xliff>"""
+        with self.assertRaises(FormServiceException):
+            FormTranslationService.import_translation_file(
+                self.user, translation.pk, SimpleUploadedFile("en.xlf", bomb)
+            )
+
+    def test_import_translation_file_skipped(self):
+        translation = FormTranslationService.create_form_translation(
+            self.user, form_id=self.form.id, language="en", region="US"
+        )
+        po = b"""msgctxt "a"
+msgid "greeting"
+msgstr "Hello!"
+
+msgctxt "b"
+msgid "greeting"
+msgstr "Hi!"
+
+msgid "apple"
+msgid_plural "apples"
+msgstr[0] "apple"
+msgstr[1] "apples"
+
+#, fuzzy
+msgid "bye"
+msgstr "Bye!"
+
+msgid "thanks"
+msgstr ""
+"""
+        result = FormTranslationService.import_translation_file(
+            self.user, translation.pk, SimpleUploadedFile("en.po", po)
+        )
+        self.assertEqual(result["created"], 2)
+        self.assertEqual(
+            dict(translation.translation_keys.values_list("key", "value")),
+            {"a.greeting": "Hello!", "b.greeting": "Hi!"},
+        )
+        self.assertEqual(
+            result["skipped"],
+            [
+                "'apple' has plural forms, which can't be imported.",
+                "'bye' is marked as fuzzy.",
+                "'thanks' is not translated.",
+            ],
+        )
+
+        xliff = b"""<?xml version="1.0"?>
+<xliff version="1.2" xmlns="urn:oasis:names:tc:xliff:document:1.2">
+  <file source-language="de" target-language="en" datatype="plaintext">
+    <body>
+      <trans-unit id="a.greeting"><target>Hey!</target></trans-unit>
+      <trans-unit id="a.greeting"><target>Howdy!</target></trans-unit>
+      <trans-unit id="a.bye"><target>Bye!</target></trans-unit>
+    </body>
+  </file>
+</xliff>"""
+        result = FormTranslationService.import_translation_file(
+            self.user, translation.pk, SimpleUploadedFile("en.xlf", xliff)
+        )
+        self.assertEqual(
+            result["skipped"], ["'a.greeting' is used by more than one entry."]
+        )
+        self.assertEqual(
+            translation.translation_keys.get(key="a.greeting").value, "Hello!"
+        )
+        self.assertTrue(translation.translation_keys.filter(key="a.bye").exists())
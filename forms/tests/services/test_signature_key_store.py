@@ -0,0 +1,109 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pgpy
+from django.test import TestCase
+
+from forms.models import SignatureKey
+from forms.services.signing import (
+    SignatureKeyStore,
+    SignatureKeyStoreException,
+    ProcessPoolSigningBackend,
+)
+from ...management.commands import create_signature_key
+
+
+class SignatureKeyStoreTest(TestCase):
+    def setUp(self):
+        SignatureKeyStore.invalidate()
+
+    def test_no_signature_key(self):
+        with self.assertRaises(SignatureKeyStoreException):
+            SignatureKeyStore.get()
+
+    def test_key_is_loaded_once(self):
+        create_signature_key.Command().handle()
+        stats = SignatureKeyStore.stats()
+
+        first = SignatureKeyStore.get()
+        second = SignatureKeyStore.get()
+
+        self.assertIs(first, second)
+        self.assertEqual(SignatureKeyStore.stats()["misses"], stats["misses"] + 1)
+        self.assertEqual(SignatureKeyStore.stats()["hits"], stats["hits"] + 1)
+
+        pub = pgpy.PGPKey()
+        pub.parse(first.public_key)
+        self.assertTrue(bool(pub.verify("helo", first.sign("helo"))))
+
+    def test_key_rotation_reloads(self):
+        create_signature_key.Command().handle()
+        first = SignatureKeyStore.get()
+        stats = SignatureKeyStore.stats()
+
+        # the command deactivates the old key with a queryset update, which
+        # doesn't send any signals
+        create_signature_key.Command().handle()
+        second = SignatureKeyStore.get()
+
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(
+            second.pk,
+            SignatureKey.objects.get(
+                active=True, key_type=SignatureKey.SignatureKeyType.SECONDARY
+            ).pk,
+        )
+        self.assertEqual(SignatureKeyStore.stats()["reloads"], stats["reloads"] + 1)
+
+
+class ProcessPoolSigningBackendTest(TestCase):
+    def setUp(self):
+        SignatureKeyStore.invalidate()
+        create_signature_key.Command().handle()
+        self.signature_key = SignatureKeyStore.get()
+        self.public_key = pgpy.PGPKey()
+        self.public_key.parse(self.signature_key.public_key)
+
+    def test_sign_concurrent_requests(self):
+        backend = ProcessPoolSigningBackend(workers=1, batch_window=0.05)
+        contents = [f"form {i}" for i in range(4)]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            signatures = list(
+                executor.map(
+                    lambda content: backend.sign(self.signature_key, content),
+                    contents,
+                )
+            )
+
+        for content, signature in zip(contents, signatures):
+            self.assertTrue(bool(self.public_key.verify(content, signature)))
+
+    def test_sign_many(self):
+        backend = ProcessPoolSigningBackend(workers=1)
+        signatures = backend.sign_many(self.signature_key, ["a", "b"])
+        self.assertTrue(bool(self.public_key.verify("a", signatures[0])))
+        self.assertTrue(bool(self.public_key.verify("b", signatures[1])))
+        self.assertFalse(bool(self.public_key.verify("a", signatures[1])))
+
+    def test_broken_pool_is_replaced(self):
+        backend = ProcessPoolSigningBackend(workers=2)
+        self.assertTrue(
+            bool(
+                self.public_key.verify(
+                    "a", backend.sign_many(self.signature_key, ["a"])[0]
+                )
+            )
+        )
+
+        pool = backend._pool
+        for process in list(pool._processes.values()):
+            process.kill()
+        deadline = time.monotonic() + 10
+        while not pool._broken and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        signatures = backend.sign_many(self.signature_key, ["b", "c", "d"])
+        self.assertIsNot(backend._pool, pool)
+        for content, signature in zip(["b", "c", "d"], signatures):
+            self.assertTrue(bool(self.public_key.verify(content, signature)))
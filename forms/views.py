@@ -1,6 +1,25 @@
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import (
+    HttpResponse,
+    Http404,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    StreamingHttpResponse,
+)
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag, require_GET
+from graphql_relay.node.node import from_global_id
 
 from forms.models import SignatureKey
+from forms.services.export import iter_ndjson, iter_tar
+from forms.services.forms import (
+    FormService,
+    FormServiceException,
+    FormReceiverService,
+    FormTranslationService,
+)
 
 
 def pgp_signature_key(request):
@@ -11,6 +30,116 @@ def pgp_signature_key(request):
     )
 
 
+def _retrieve_form_bundle(request, form_id):
+    # the etag callback and the view share one cache read
+    if not hasattr(request, "_form_bundle"):
+        try:
+            request._form_bundle = FormService.retrieve_form_bundle(
+                int(from_global_id(form_id)[1])
+            )
+        except (ValueError, FormServiceException):
+            request._form_bundle = None
+    return request._form_bundle
+
+
+def _form_bundle_etag(request, form_id):
+    bundle = _retrieve_form_bundle(request, form_id)
+    return bundle["etag"] if bundle else None
+
+
+@require_GET
+@cache_control(public=True, max_age=settings.FORM_BUNDLE_MAX_AGE)
+@etag(_form_bundle_etag)
+def form_bundle(request, form_id):
+    """returns the code, schema, translations and recipient keys of a public form"""
+    bundle = _retrieve_form_bundle(request, form_id)
+    if bundle is None:
+        raise Http404()
+    return HttpResponse(bundle["content"], content_type="application/json")
+
+
+def _retrieve_translation_catalog(request, form_id, locale):
+    # the etag callback and the view share one cache read
+    if not hasattr(request, "_translation_catalog"):
+        try:
+            request._translation_catalog = (
+                FormTranslationService.retrieve_translation_catalog(
+                    int(from_global_id(form_id)[1]), locale
+                )
+            )
+        except (ValueError, FormServiceException):
+            request._translation_catalog = None
+    return request._translation_catalog
+
+
+def _translation_catalog_etag(request, form_id, locale):
+    catalog = _retrieve_translation_catalog(request, form_id, locale)
+    return catalog["etag"] if catalog else None
+
+
+@require_GET
+@cache_control(public=True, max_age=settings.FORM_BUNDLE_MAX_AGE)
+@etag(_translation_catalog_etag)
+def translation_catalog(request, form_id, locale):
+    """returns the translations of a public form for a locale, with fallbacks"""
+    catalog = _retrieve_translation_catalog(request, form_id, locale)
+    if catalog is None:
+        raise Http404()
+    return HttpResponse(catalog["content"], content_type="application/json")
+
+
+SUBMISSION_EXPORT_FORMATS = {
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+    "tar": (iter_tar, "application/x-tar"),
+}
+
+
+def _parse_export_filters(params) -> dict:
+    filters = {}
+    for name in ["form", "team"]:
+        if params.get(name):
+            filters[f"{name}_id"] = int(from_global_id(params[name])[1])
+    for name in ["submitted_after", "submitted_before"]:
+        if params.get(name):
+            value = parse_datetime(params[name])
+            if value is None:
+                raise ValueError(name)
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            filters[name] = value
+    return filters
+
+
+@require_GET
+def export_submissions(request):
+    """
+    streams the accessible submissions as ndjson or tar (?format=tar), optionally
+    filtered by form, team (global ids) and submitted_after/submitted_before
+    """
+    if not request.user.is_authenticated:
+        return HttpResponseForbidden()
+
+    export_format = request.GET.get("format", "ndjson")
+    if export_format not in SUBMISSION_EXPORT_FORMATS:
+        return HttpResponseBadRequest("Unknown export format.")
+    try:
+        filters = _parse_export_filters(request.GET)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid filter.")
+
+    try:
+        submissions = FormReceiverService.export_submissions(request.user, **filters)
+    except PermissionError:
+        return HttpResponseForbidden()
+
+    serialize, content_type = SUBMISSION_EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(serialize(submissions), content_type=content_type)
+    response[
+        "Content-Disposition"
+    ] = f'attachment; filename="submissions.{export_format}"'
+    return response
+
+
 def home(request):
     """serve 200 at /"""
     return HttpResponse("Hey there!", content_type="text/plain")
@@ -1,3 +1,6 @@
 from django.contrib import admin
 
 # Register your models here.
+from oauth.models import InstanceLanguage
+
+admin.site.register(InstanceLanguage)
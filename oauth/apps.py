@@ -9,3 +9,10 @@ class OauthConfig(AppConfig):
 
     def ready(self):
         self.register_signals()
+
+        from oauth.keys import JWTKeyRegistry
+        from oauth.languages import LanguageRegistry
+
+        # parse the jwt keys once, broken keys should fail at startup
+        JWTKeyRegistry.load()
+        LanguageRegistry.load()
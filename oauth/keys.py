@@ -0,0 +1,174 @@
+import threading
+from typing import Dict, List, Optional
+
+import jwt
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from jwt.algorithms import get_default_algorithms
+
+SUPPORTED_ALGORITHMS = ["RS256", "ES256", "EdDSA"]
+
+
+class JWTKey:
+    """a parsed signing or verification key of an issuer"""
+
+    def __init__(
+        self,
+        kid: Optional[str],
+        algorithm: str,
+        private_key: str = None,
+        public_key: str = None,
+    ):
+        if algorithm not in SUPPORTED_ALGORITHMS:
+            raise ImproperlyConfigured(f"Unsupported jwt algorithm {algorithm}")
+        if not private_key and not public_key:
+            raise ImproperlyConfigured(f"The jwt key {kid} has no key material")
+
+        prepare_key = get_default_algorithms()[algorithm].prepare_key
+        self.kid = kid
+        self.algorithm = algorithm
+        self.private_key = prepare_key(private_key) if private_key else None
+        self.public_key = (
+            prepare_key(public_key) if public_key else self.private_key.public_key()
+        )
+
+
+class JWTKeyRegistry:
+    """
+    signing and verification keys of the jwt access tokens, parsed once at startup
+
+    The keys of each issuer are configured in JWT_KEYS, newest first:
+
+        JWT_KEYS = {
+            "FORMULARIUM": [
+                {"kid": "2021-06", "algorithm": "EdDSA", "private_key": "..."},
+                {"kid": "2021-01", "algorithm": "RS256", "public_key": "..."},
+            ]
+        }
+
+    The first key with a private key signs new tokens and puts its kid in the token
+    header, all keys verify tokens carrying their kid. This way a new key can be
+    rolled out while tokens signed with the old one are still accepted. Issuers that
+    aren't in JWT_KEYS fall back to JWT_PRIVATE_KEY_<ISSUER>/JWT_PUBLIC_KEY_<ISSUER>
+    with JWT_ENC_ALGORITHM and no kid.
+    """
+
+    _lock = threading.Lock()
+    _keys: Optional[Dict[str, List[JWTKey]]] = None
+
+    @classmethod
+    def load(cls):
+        """parse all configured keys, replacing the loaded ones"""
+        keys = {}
+        for issuer, issuer_keys in getattr(settings, "JWT_KEYS", {}).items():
+            keys[issuer.upper()] = [
+                JWTKey(
+                    key.get("kid"),
+                    key.get("algorithm", "RS256"),
+                    private_key=key.get("private_key"),
+                    public_key=key.get("public_key"),
+                )
+                for key in issuer_keys
+            ]
+
+        issuer = getattr(settings, "JWT_ISSUER", "").upper()
+        if issuer and issuer not in keys:
+            private_key = getattr(settings, f"JWT_PRIVATE_KEY_{issuer}", None)
+            public_key = getattr(settings, f"JWT_PUBLIC_KEY_{issuer}", None)
+            if private_key or public_key:
+                keys[issuer] = [
+                    JWTKey(
+                        None,
+                        getattr(settings, "JWT_ENC_ALGORITHM", "RS256"),
+                        private_key=private_key,
+                        public_key=public_key,
+                    )
+                ]
+
+        with cls._lock:
+            cls._keys = keys
+
+    @classmethod
+    def reset(cls):
+        """drop the loaded keys, they are parsed again on next use"""
+        with cls._lock:
+            cls._keys = None
+
+    @classmethod
+    def _issuer_keys(cls, issuer: str) -> List[JWTKey]:
+        if cls._keys is None:
+            cls.load()
+        return cls._keys.get(issuer.upper(), [])
+
+    @classmethod
+    def signing_key(cls, issuer: str) -> Optional[JWTKey]:
+        """
+        get the key new tokens of an issuer are signed with
+        :param issuer: the issuer of the token
+        :return: the newest key with a private key, None if there is none
+        """
+        for key in cls._issuer_keys(issuer):
+            if key.private_key is not None:
+                return key
+        return None
+
+    @classmethod
+    def verification_keys(cls, issuer: str, kid: str = None) -> List[JWTKey]:
+        """
+        get the keys a token of an issuer might be signed with
+        :param issuer: the issuer of the token
+        :param kid: the key id from the token header
+        :return: the key with this kid, all keys of the issuer for tokens without a kid
+        """
+        keys = cls._issuer_keys(issuer)
+        if kid is None:
+            return keys
+        return [key for key in keys if key.kid == kid]
+
+
+def encode_jwt(payload: dict, headers: dict = None) -> str:
+    """
+    sign a jwt with the current key of its issuer
+    :param payload: the payload, including the issuer (iss)
+    :param headers: additional headers
+    :return: the encoded token
+    """
+    key = JWTKeyRegistry.signing_key(payload["iss"])
+    if key is None:
+        raise ImproperlyConfigured(f"Missing signing key for {payload['iss']}")
+
+    headers = dict(headers or {})
+    if key.kid:
+        headers["kid"] = key.kid
+    return jwt.encode(
+        payload, key.private_key, algorithm=key.algorithm, headers=headers or None
+    )
+
+
+def decode_jwt(token: str) -> dict:
+    """
+    verify a jwt with the keys of its issuer
+    :param token: the encoded token
+    :return: the verified payload
+    """
+    header = jwt.get_unverified_header(token)
+    issuer = jwt.decode(token, options={"verify_signature": False}).get("iss")
+    if not issuer:
+        raise jwt.InvalidTokenError()
+
+    # only keys of the algorithm in the header can have signed the token, decoding
+    # with the others fails with InvalidAlgorithmError instead of trying the next key
+    keys = [
+        key
+        for key in JWTKeyRegistry.verification_keys(issuer, header.get("kid"))
+        if key.algorithm == header.get("alg")
+    ]
+    if not keys:
+        raise jwt.InvalidTokenError()
+    for key in keys:
+        try:
+            # the algorithm is pinned by the key, not taken from the token
+            return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+        except jwt.InvalidSignatureError:
+            continue
+    raise jwt.InvalidSignatureError()
@@ -0,0 +1,124 @@
+import threading
+import time
+import uuid
+from typing import FrozenSet, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class Language(NamedTuple):
+    """a language users and translations can use"""
+
+    language: str
+    iso_code: str
+
+
+class LanguageRegistry:
+    """
+    the languages of the instance: settings.LANGUAGES, built once at startup, plus
+    the active InstanceLanguages from the database
+
+    The database languages are loaded again whenever the version in the cache
+    changes, which the InstanceLanguage receivers in oauth.signals take care of.
+    The version is checked at most every settings.LANGUAGE_REGISTRY_CHECK_INTERVAL
+    seconds, so changes made in other processes show up with that delay.
+    """
+
+    VERSION_KEY = "instance-languages-version"
+
+    _lock = threading.Lock()
+    _configured: Optional[Tuple[Language, ...]] = None
+    _languages: Tuple[Language, ...] = ()
+    _iso_codes: FrozenSet[str] = frozenset()
+    _language_codes: FrozenSet[str] = frozenset()
+    _version: Optional[str] = None
+    _checked_at: float = 0.0
+
+    @classmethod
+    def load(cls):
+        """build the languages from settings.LANGUAGES"""
+        with cls._lock:
+            cls._configured = tuple(
+                Language(language=name, iso_code=iso_code)
+                for iso_code, name in settings.LANGUAGES
+            )
+            cls._version = None
+
+    @classmethod
+    def _current_version(cls) -> str:
+        version = cache.get(cls.VERSION_KEY)
+        if version is None:
+            cache.add(cls.VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(cls.VERSION_KEY)
+        return version
+
+    @classmethod
+    def _refresh(cls):
+        from oauth.models import InstanceLanguage
+
+        if cls._configured is None:
+            cls.load()
+        now = time.monotonic()
+        if (
+            cls._version is not None
+            and now - cls._checked_at < settings.LANGUAGE_REGISTRY_CHECK_INTERVAL
+        ):
+            return
+        version = cls._current_version()
+        cls._checked_at = now
+        if version == cls._version:
+            return
+
+        languages = list(cls._configured)
+        iso_codes = {language.iso_code for language in languages}
+        for iso_code, name in InstanceLanguage.objects.filter(active=True).values_list(
+            "iso_code", "name"
+        ):
+            if iso_code not in iso_codes:
+                languages.append(Language(language=name, iso_code=iso_code))
+                iso_codes.add(iso_code)
+
+        with cls._lock:
+            cls._languages = tuple(languages)
+            cls._iso_codes = frozenset(iso_codes)
+            cls._language_codes = frozenset(
+                iso_code.split("-")[0] for iso_code in iso_codes
+            )
+            cls._version = version
+
+    @classmethod
+    def languages(cls) -> Tuple[Language, ...]:
+        """
+        get all languages of the instance
+        :return: the configured languages followed by the ones from the database
+        """
+        cls._refresh()
+        return cls._languages
+
+    @classmethod
+    def is_available(cls, iso_code: str) -> bool:
+        """
+        check if a language is available on this instance
+        :param iso_code: the language code, e.g. de-DE
+        :return: True if the language is configured or enabled
+        """
+        cls._refresh()
+        return iso_code in cls._iso_codes
+
+    @classmethod
+    def is_available_language(cls, language: str) -> bool:
+        """
+        check if a language is available on this instance in any region
+        :param language: the language code, e.g. de
+        :return: True if an available language has this language code
+        """
+        cls._refresh()
+        return language in cls._language_codes
+
+    @classmethod
+    def invalidate(cls):
+        """load the languages from the database again, in all processes"""
+        cache.set(cls.VERSION_KEY, uuid.uuid4().hex, None)
+        with cls._lock:
+            cls._version = None
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.2 on 2026-10-18 09:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("oauth", "0002_auto_20210206_1222"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InstanceLanguage",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("iso_code", models.CharField(max_length=20, unique=True)),
+                ("name", models.CharField(max_length=100)),
+                ("active", models.BooleanField(default=True)),
+            ],
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import Group, Permission
 from django.db.models.signals import post_save
@@ -5,6 +6,8 @@ from django.dispatch import receiver
 
 from django.utils.translation import gettext as _
 from django.conf import settings
+from languages.languages import LANGUAGES
+from languages.regions import REGIONS
 
 
 class UserProfile(models.Model):
@@ -25,6 +28,27 @@ class UserProfile(models.Model):
         return f"{self.user}: Profile"
 
 
+class InstanceLanguage(models.Model):
+    """
+    a language enabled on this instance in addition to settings.LANGUAGES
+    """
+
+    iso_code = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=100)
+    active = models.BooleanField(default=True)
+
+    def clean(self):
+        # translations can only be created for known languages and regions
+        language, _sep, region = self.iso_code.partition("-")
+        if language not in dict(LANGUAGES) or region not in dict(REGIONS):
+            raise ValidationError(
+                {"iso_code": _("Use a known language and region, e.g. nds-DE.")}
+            )
+
+    def __str__(self):
+        return f"{self.name} ({self.iso_code})"
+
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_user_profile(sender, instance, **kwargs):
     UserProfile.objects.get_or_create(user=instance)
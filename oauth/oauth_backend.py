@@ -1,10 +1,15 @@
+from datetime import datetime
+
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 import jwt
-from oauth2_provider_jwt.utils import decode_jwt
 from oauthlib.common import Request
 from rest_framework import exceptions
 from oauth2_provider.oauth2_backends import get_oauthlib_core
 
+from oauth.keys import decode_jwt
+from oauth.token_cache import TokenVerificationCache
+
 
 UserModel = get_user_model()
 OAuthLibCore = get_oauthlib_core()
@@ -20,6 +25,22 @@ class OAuth2Backend:
             if "Authorization" in request.headers:
                 hdr = request.headers["Authorization"].split()
 
+                # skip the signature check and the token lookup for tokens that
+                # have been verified recently. The entry is keyed by the whole signed
+                # jwt, so reading the access token without verifying it is enough to
+                # find it.
+                version = None
+                try:
+                    access_token = jwt.decode(
+                        hdr[1], options={"verify_signature": False}
+                    )["access_token"]
+                except (jwt.InvalidTokenError, KeyError):
+                    access_token = None
+                if access_token is not None:
+                    verified, version = TokenVerificationCache.get(hdr[1], access_token)
+                    if verified is not None:
+                        return verified["user"]
+
                 try:
                     payload = decode_jwt(hdr[1])
                 except jwt.ExpiredSignatureError:
@@ -41,6 +62,14 @@ class OAuth2Backend:
                     uri, http_method, body, headers, scopes=[]
                 )
                 if valid:
+                    expires = r.access_token.expires
+                    if "exp" in payload:
+                        expires = min(
+                            expires,
+                            datetime.fromtimestamp(payload["exp"], tz=timezone.utc),
+                        )
+                    if access_token == payload["access_token"]:
+                        TokenVerificationCache.set(hdr[1], version, r.user, expires)
                     return r.user
         return None
 
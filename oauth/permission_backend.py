@@ -0,0 +1,137 @@
+import uuid
+from typing import Callable, Set
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+from guardian.core import ObjectPermissionChecker
+from serious_django_permissions.permissions import Permission, PermissionModelBackend
+
+
+class PermissionSnapshot:
+    """
+    permissions of a user, computed once and shared through the cache
+
+    Snapshots carry the global and the per user version they were computed under
+    and are read together with the current versions, so a cache hit is a single
+    round trip to the cache and no query. Changing a version turns all snapshots
+    computed under the old one into misses, see the receivers in oauth.signals for
+    what invalidates which version. The versions live in the default cache, which
+    is shared by all workers (see forms.W001), so a revoked permission is gone in
+    every worker at once.
+    """
+
+    VERSION_KEY = "permission-snapshot-version"
+
+    @staticmethod
+    def _user_version_key(user_id: int) -> str:
+        return f"permission-snapshot-version:{user_id}"
+
+    @classmethod
+    def get(cls, user, scope: str, compute: Callable[[], Set[str]]) -> Set[str]:
+        """
+        get a snapshot of the permissions of a user, the versions and the snapshot
+        are read from the cache at once
+        :param user: the user
+        :param scope: what the permissions are for, e.g. "global"
+        :param compute: computes the permissions if there is no snapshot yet
+        :return: the set of permissions
+        """
+        version_keys = [cls.VERSION_KEY, cls._user_version_key(user.pk)]
+        key = f"permission-snapshot:{user.pk}:{scope}"
+        cached = cache.get_many(version_keys + [key])
+        versions = [cached.get(version_key) for version_key in version_keys]
+        if None in versions:
+            for version_key in version_keys:
+                cache.add(version_key, uuid.uuid4().hex, None)
+            cached = cache.get_many(version_keys)
+            versions = [cached.get(version_key) for version_key in version_keys]
+
+        # a snapshot computed before the last change carries the old versions
+        snapshot = cached.get(key)
+        if snapshot is not None and snapshot["versions"] == versions:
+            return snapshot["permissions"]
+        permissions = set(compute())
+        cache.set(
+            key,
+            {"versions": versions, "permissions": permissions},
+            settings.PERMISSION_SNAPSHOT_TTL,
+        )
+        return permissions
+
+    @staticmethod
+    def _bump(version_key: str):
+        cache.set(version_key, uuid.uuid4().hex, None)
+        # a request reading the permissions before the change is committed may
+        # have stored a snapshot under the new version
+        transaction.on_commit(lambda: cache.set(version_key, uuid.uuid4().hex, None))
+
+    @classmethod
+    def invalidate_user(cls, user_id: int):
+        """drop the snapshots of a user"""
+        cls._bump(cls._user_version_key(user_id))
+
+    @classmethod
+    def invalidate_all(cls):
+        """drop the snapshots of all users"""
+        cls._bump(cls.VERSION_KEY)
+
+
+class PermissionSnapshotBackend(PermissionModelBackend):
+    """
+    PermissionModelBackend that checks permissions against snapshots instead of the
+    database
+
+    Global permissions are one snapshot per user, object permissions one per user
+    and object, computed with guardian's ObjectPermissionChecker like
+    PermissionModelBackend does. Within a request the snapshots are kept on the user
+    object, so the permissions_checker of the schema and the services share them.
+    It replaces ModelBackend (password logins are inherited from it) and
+    PermissionModelBackend.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, "_perm_cache"):
+            user_obj._perm_cache = PermissionSnapshot.get(
+                user_obj,
+                "global",
+                lambda: ModelBackend.get_all_permissions(self, user_obj),
+            )
+        return user_obj._perm_cache
+
+    def get_object_permissions(self, user_obj, obj) -> Set[str]:
+        """
+        get the codenames of the permissions a user has on an object
+        :param user_obj: the user
+        :param obj: the model instance
+        :return: the set of permission codenames
+        """
+        scope = f"object:{obj._meta.label_lower}:{obj.pk}"
+        if not hasattr(user_obj, "_object_perm_cache"):
+            user_obj._object_perm_cache = {}
+        if scope not in user_obj._object_perm_cache:
+            user_obj._object_perm_cache[scope] = PermissionSnapshot.get(
+                user_obj,
+                scope,
+                lambda: ObjectPermissionChecker(user_obj).get_perms(obj),
+            )
+        return user_obj._object_perm_cache[scope]
+
+    def has_perm(self, user_obj, perm, obj=None):
+        if obj is None:
+            return super().has_perm(user_obj, perm)
+
+        perm_str = (
+            perm.__perm_str__
+            if isinstance(perm, type) and issubclass(perm, Permission)
+            else perm
+        )
+        # the same checks as guardian's ObjectPermissionChecker.has_perm
+        if not user_obj.is_active or user_obj.is_anonymous:
+            return False
+        if user_obj.is_superuser:
+            return True
+        return perm_str.split(".", 1)[-1] in self.get_object_permissions(user_obj, obj)
@@ -11,6 +11,7 @@ from graphene import relay, ObjectType, Field
 from graphene_django.filter import DjangoFilterConnectionField
 from graphene_django.types import DjangoObjectType
 from graphene_file_upload.scalars import Upload
+from promise import Promise
 from serious_django_graphene import (
     get_user_from_info,
     FailableMutation,
@@ -18,6 +19,8 @@ from serious_django_graphene import (
 )
 
 from oauth.services import UserProfileService
+from schema_utils.dataloaders import load_related
+from schema_utils.optimizer import optimize_queryset
 
 
 class Group(DjangoObjectType):
@@ -36,12 +39,21 @@ class UserType(PermissionDjangoObjectType):
     language = graphene.String()
     profile_picture = graphene.String()
 
+    optimizer_hints = {"language": ["profile"], "profile_picture": ["profile"]}
+
     def resolve_language(self, info):
-        return self.profile.language
+        return Promise.resolve(load_related(info, self, "profile")).then(
+            lambda profile: profile.language if profile else None
+        )
 
     def resolve_profile_picture(self, info):
-        if self.profile.profile_picture:
-            return self.profile.profile_picture.url
+        def profile_picture_url(profile):
+            if profile and profile.profile_picture:
+                return profile.profile_picture.url
+
+        return Promise.resolve(load_related(info, self, "profile")).then(
+            profile_picture_url
+        )
 
     class Meta:
         model = get_user_model()
@@ -99,7 +111,7 @@ class Query(ObjectType):
     @permissions_checker([IsAuthenticated])
     def resolve_all_users(self, info, **kwargs):
         user = get_user_from_info(info)
-        return get_user_model().objects.all()
+        return optimize_queryset(get_user_model().objects.all(), info)
 
     def resolve_get_available_languages(self, info, **kwargs):
         user = get_user_from_info(info)
@@ -5,6 +5,7 @@ from django.conf import settings
 from serious_django_services import Service, CRUDMixin
 
 from oauth.forms import UpdateUserProfileForm, CreateUserProfileForm
+from oauth.languages import LanguageRegistry
 from oauth.models import UserProfile
 
 
@@ -63,8 +64,4 @@ class UserProfileService(Service, CRUDMixin):
         :param user: the user you want to retrieve the informations for
         :return: a list of available languages
         """
-        languages = []
-        for language in settings.LANGUAGES:
-            languages.append({"language": language[1], "iso_code": language[0]})
-
-        return languages
+        return LanguageRegistry.languages()
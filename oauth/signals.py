@@ -1,5 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.apps import apps
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
 
-from oauth.models import UserProfile
+from oauth2_provider.models import get_access_token_model
+
+from oauth.keys import JWTKeyRegistry
+from oauth.languages import LanguageRegistry
+from oauth.models import UserProfile, InstanceLanguage
+from oauth.permission_backend import PermissionSnapshot
+from oauth.token_cache import TokenVerificationCache
+
+
+@receiver(post_save, sender=get_access_token_model())
+@receiver(post_delete, sender=get_access_token_model())
+def evict_verified_access_token(sender, instance, **kwargs):
+    """revoked (deleted) or changed access tokens must be verified again"""
+    token = instance.token
+    TokenVerificationCache.evict(token)
+    # a request verifying the token before the revocation is committed may have
+    # cached it again
+    transaction.on_commit(lambda: TokenVerificationCache.evict(token))
+
+
+@receiver(post_save, sender=get_user_model())
+def evict_access_tokens_of_user(sender, instance, update_fields=None, **kwargs):
+    """the verified tokens carry their user, who must be loaded again on changes"""
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    tokens = list(
+        get_access_token_model()
+        .objects.filter(user=instance)
+        .values_list("token", flat=True)
+    )
+
+    def evict():
+        for token in tokens:
+            TokenVerificationCache.evict(token)
+
+    evict()
+    # a request verifying a token before the change is committed may have cached
+    # the old user again
+    transaction.on_commit(evict)
+
+
+@receiver(setting_changed)
+def reset_jwt_keys(setting, **kwargs):
+    if setting.startswith("JWT_"):
+        JWTKeyRegistry.reset()
+
+
+@receiver(setting_changed)
+def reload_languages(setting, **kwargs):
+    if setting == "LANGUAGES":
+        LanguageRegistry.load()
+
+
+@receiver(post_save, sender=InstanceLanguage)
+@receiver(post_delete, sender=InstanceLanguage)
+def invalidate_instance_languages(sender, **kwargs):
+    # other processes must not load the languages before the change is committed
+    transaction.on_commit(LanguageRegistry.invalidate)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_permissions_of_user(sender, instance, **kwargs):
+    """e.g. the user has been (de)activated or became a superuser"""
+    PermissionSnapshot.invalidate_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+@receiver(m2m_changed, sender=get_user_model().user_permissions.through)
+def invalidate_permissions_on_membership_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """users were added to or removed from a group, or got permissions directly"""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        PermissionSnapshot.invalidate_user(instance.pk)
+    elif action == "post_clear":
+        # the removed users aren't known anymore
+        PermissionSnapshot.invalidate_all()
+    else:
+        for user_id in pk_set:
+            PermissionSnapshot.invalidate_user(user_id)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_permissions_on_group_change(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        PermissionSnapshot.invalidate_all()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_all_permissions(sender, **kwargs):
+    PermissionSnapshot.invalidate_all()
+
+
+def invalidate_object_permissions_of_user(sender, instance, **kwargs):
+    PermissionSnapshot.invalidate_user(instance.user_id)
+
+
+def invalidate_object_permissions_of_group(sender, instance, **kwargs):
+    PermissionSnapshot.invalidate_all()
+
+
+# object permissions are assigned with guardian's models, if it is installed
+if apps.is_installed("guardian"):
+    from guardian.models import UserObjectPermission, GroupObjectPermission
+
+    for signal in (post_save, post_delete):
+        signal.connect(invalidate_object_permissions_of_user, UserObjectPermission)
+        signal.connect(invalidate_object_permissions_of_group, GroupObjectPermission)
@@ -0,0 +1,120 @@
+import time
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from oauth.keys import JWTKeyRegistry, encode_jwt, decode_jwt
+
+
+def private_pem(key):
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def public_pem(key):
+    return (
+        key.public_key()
+        .public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        .decode()
+    )
+
+
+class JWTKeyRegistryTest(TestCase):
+    def setUp(self):
+        self.payload = {"iss": "FORMULARIUM", "exp": int(time.time()) + 60}
+        self.ed_key = ed25519.Ed25519PrivateKey.generate()
+        self.ec_key = ec.generate_private_key(ec.SECP256R1())
+
+    def test_legacy_settings(self):
+        token = encode_jwt(self.payload)
+        self.assertNotIn("kid", jwt.get_unverified_header(token))
+        self.assertEqual(decode_jwt(token)["iss"], "FORMULARIUM")
+
+    def test_key_rotation(self):
+        with self.settings(
+            JWT_KEYS={
+                "FORMULARIUM": [
+                    {
+                        "kid": "old",
+                        "algorithm": "ES256",
+                        "private_key": private_pem(self.ec_key),
+                    }
+                ]
+            }
+        ):
+            old_token = encode_jwt(self.payload)
+            self.assertEqual(jwt.get_unverified_header(old_token)["kid"], "old")
+
+        with self.settings(
+            JWT_KEYS={
+                "FORMULARIUM": [
+                    {
+                        "kid": "new",
+                        "algorithm": "EdDSA",
+                        "private_key": private_pem(self.ed_key),
+                    },
+                    {
+                        "kid": "old",
+                        "algorithm": "ES256",
+                        "public_key": public_pem(self.ec_key),
+                    },
+                ]
+            }
+        ):
+            new_token = encode_jwt(self.payload)
+            header = jwt.get_unverified_header(new_token)
+            self.assertEqual((header["kid"], header["alg"]), ("new", "EdDSA"))
+            self.assertEqual(decode_jwt(new_token)["iss"], "FORMULARIUM")
+            self.assertEqual(decode_jwt(old_token)["iss"], "FORMULARIUM")
+
+            # the keys are parsed once
+            key = JWTKeyRegistry.signing_key("FORMULARIUM")
+            encode_jwt(self.payload)
+            self.assertIs(JWTKeyRegistry.signing_key("FORMULARIUM"), key)
+
+        with self.settings(
+            JWT_KEYS={
+                "FORMULARIUM": [
+                    {
+                        "kid": "new",
+                        "algorithm": "EdDSA",
+                        "private_key": private_pem(self.ed_key),
+                    }
+                ]
+            }
+        ):
+            # the retired key doesn't verify anything anymore
+            with self.assertRaises(jwt.InvalidTokenError):
+                decode_jwt(old_token)
+
+    def test_token_without_kid_and_mixed_algorithms(self):
+        legacy_token = encode_jwt(self.payload)
+        with self.settings(
+            JWT_KEYS={
+                "FORMULARIUM": [
+                    {"algorithm": "EdDSA", "private_key": private_pem(self.ed_key)},
+                    {"algorithm": "ES256", "public_key": public_pem(self.ec_key)},
+                    {
+                        "algorithm": "RS256",
+                        "public_key": settings.JWT_PUBLIC_KEY_FORMULARIUM,
+                    },
+                ]
+            }
+        ):
+            self.assertEqual(decode_jwt(legacy_token)["iss"], "FORMULARIUM")
+            self.assertEqual(decode_jwt(encode_jwt(self.payload))["iss"], "FORMULARIUM")
+
+    def test_tampered_token(self):
+        token = encode_jwt(self.payload)
+        header, payload, signature = token.split(".")
+        with self.assertRaises(jwt.InvalidSignatureError):
+            decode_jwt(".".join([header, payload, signature[::-1]]))
@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase
+from serious_django_permissions.management.commands import create_permissions
+
+from forms.permissions import CanEditFormPermission
+
+
+class PermissionSnapshotBackendTest(TestCase):
+    def setUp(self):
+        create_permissions.Command().handle()
+        self.user = get_user_model().objects.create_user(
+            username="tester", password="refefe"
+        )
+        self.group = Group.objects.create(name="editors")
+        self.group.permissions.add(CanEditFormPermission.get())
+
+    def fresh_user(self):
+        # a new user object per request, the snapshot has to come from the cache
+        return get_user_model().objects.get(pk=self.user.pk)
+
+    def test_snapshot_is_shared_between_requests(self):
+        self.user.groups.add(self.group)
+        self.assertTrue(self.fresh_user().has_perm(CanEditFormPermission))
+
+        # the versions and the snapshot are read from the cache at once
+        user = self.fresh_user()
+        with self.assertNumQueries(0), mock.patch.object(
+            cache, "get_many", wraps=cache.get_many
+        ) as get_many:
+            self.assertTrue(user.has_perm(CanEditFormPermission))
+            self.assertTrue(user.has_perm(CanEditFormPermission))
+        self.assertEqual(get_many.call_count, 1)
+
+    def test_snapshot_is_invalidated_on_group_change(self):
+        self.assertFalse(self.fresh_user().has_perm(CanEditFormPermission))
+        self.user.groups.add(self.group)
+        self.assertTrue(self.fresh_user().has_perm(CanEditFormPermission))
+        self.group.user_set.remove(self.user)
+        self.assertFalse(self.fresh_user().has_perm(CanEditFormPermission))
+
+    def test_replaced_backends(self):
+        # password logins of ModelBackend
+        self.assertEqual(authenticate(username="tester", password="refefe"), self.user)
+
+        # object permissions are computed by guardian as before
+        with mock.patch("oauth.permission_backend.ObjectPermissionChecker") as checker:
+            checker.return_value.get_perms.return_value = ["can_edit_form"]
+            self.assertTrue(
+                self.fresh_user().has_perm(CanEditFormPermission, self.group)
+            )
+        checker.return_value.get_perms.assert_called_once_with(self.group)
+
+    def test_object_permissions_are_shared_between_requests(self):
+        with mock.patch("oauth.permission_backend.ObjectPermissionChecker") as checker:
+            checker.return_value.get_perms.return_value = ["can_edit_form"]
+            user = self.fresh_user()
+            self.assertTrue(user.has_perm(CanEditFormPermission, self.group))
+            self.assertFalse(user.has_perm("forms.can_delete_form", self.group))
+            self.assertTrue(
+                self.fresh_user().has_perm(CanEditFormPermission, self.group)
+            )
+            # one snapshot per object
+            other = Group.objects.create(name="others")
+            checker.return_value.get_perms.return_value = []
+            self.assertFalse(self.fresh_user().has_perm(CanEditFormPermission, other))
+            self.assertEqual(checker.return_value.get_perms.call_count, 2)
+
+            # a change of the user's groups computes them again
+            self.user.groups.add(self.group)
+            self.assertFalse(
+                self.fresh_user().has_perm(CanEditFormPermission, self.group)
+            )
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, RequestFactory
+from django.utils import timezone
+from oauth2_provider.models import get_access_token_model
+
+from oauth.keys import encode_jwt
+from oauth.oauth_backend import OAuth2Backend
+from oauth.token_cache import TokenVerificationCache
+
+
+class TokenVerificationCacheTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="tester", password="refefe"
+        )
+        self.access_token = get_access_token_model().objects.create(
+            user=self.user,
+            token="access-token",
+            expires=timezone.now() + timedelta(hours=1),
+            scope="admin",
+        )
+
+    def test_verified_token_is_cached(self):
+        verified, version = TokenVerificationCache.get("jwt", "access-token")
+        self.assertIsNone(verified)
+        TokenVerificationCache.set("jwt", version, self.user, self.access_token.expires)
+        verified, version = TokenVerificationCache.get("jwt", "access-token")
+        self.assertEqual(verified["user"], self.user)
+
+    def test_expired_token_is_not_cached(self):
+        verified, version = TokenVerificationCache.get("jwt", "access-token")
+        TokenVerificationCache.set("jwt", version, self.user, timezone.now())
+        self.assertIsNone(TokenVerificationCache.get("jwt", "access-token")[0])
+
+    def test_revoked_token_is_evicted(self):
+        for jwt in ["jwt", "another-jwt"]:
+            verified, version = TokenVerificationCache.get(jwt, "access-token")
+            TokenVerificationCache.set(
+                jwt, version, self.user, self.access_token.expires
+            )
+        self.access_token.revoke()
+        self.assertIsNone(TokenVerificationCache.get("jwt", "access-token")[0])
+        self.assertIsNone(TokenVerificationCache.get("another-jwt", "access-token")[0])
+
+    def test_revocation_during_verification(self):
+        # the token is revoked after the request read the version, the result it
+        # stores is outdated
+        verified, version = TokenVerificationCache.get("jwt", "access-token")
+        TokenVerificationCache.evict("access-token")
+        TokenVerificationCache.set("jwt", version, self.user, self.access_token.expires)
+        self.assertIsNone(TokenVerificationCache.get("jwt", "access-token")[0])
+
+    def test_backend_uses_cache(self):
+        token = encode_jwt({"iss": "FORMULARIUM", "access_token": "access-token"})
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        backend = OAuth2Backend()
+        self.assertEqual(backend.authenticate(request), self.user)
+        self.assertIsNotNone(TokenVerificationCache.get(token, "access-token")[0])
+
+        # the user comes from the cache, no token lookup and no user query
+        with self.assertNumQueries(0):
+            self.assertEqual(backend.authenticate(request), self.user)
+
+        # changes to the user are seen right away
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(backend.authenticate(request).is_active)
+
+        self.access_token.revoke()
+        self.assertIsNone(backend.authenticate(request))
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.test import TestCase, RequestFactory
 from django.conf import settings
 
@@ -7,6 +8,8 @@ from serious_django_permissions.management.commands import (
     create_permissions,
 )
 
+from oauth.languages import LanguageRegistry
+from oauth.models import InstanceLanguage
 from oauth.services import UserProfileService
 
 
@@ -29,3 +32,33 @@ class UserProfileServiceTest(TestCase):
     def test_get_available_languages(self):
         languages = UserProfileService.get_available_language(self.test_user)
         self.assertEqual(len(languages), len(settings.LANGUAGES))
+
+    def test_instance_languages(self):
+        self.assertFalse(LanguageRegistry.is_available("nds-DE"))
+        # the rows are rolled back without a delete signal
+        self.addCleanup(LanguageRegistry.invalidate)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            language = InstanceLanguage.objects.create(iso_code="nds-DE", name="Platt")
+        self.assertTrue(LanguageRegistry.is_available("nds-DE"))
+        languages = UserProfileService.get_available_language(self.test_user)
+        self.assertEqual(len(languages), len(settings.LANGUAGES) + 1)
+        self.assertEqual(languages[-1].language, "Platt")
+
+        # the version was just checked
+        with self.assertNumQueries(0):
+            LanguageRegistry.is_available("de-DE")
+
+        # other processes only see the change once it is committed
+        with self.captureOnCommitCallbacks() as callbacks:
+            language.active = False
+            language.save()
+        self.assertTrue(LanguageRegistry.is_available("nds-DE"))
+        callbacks[0]()
+        self.assertFalse(LanguageRegistry.is_available("nds-DE"))
+
+    def test_instance_language_codes(self):
+        InstanceLanguage(iso_code="nds-DE", name="Platt").full_clean()
+        for iso_code in ["nds", "xx-DE", "nds-AB", "nds-DE-1"]:
+            with self.assertRaises(ValidationError):
+                InstanceLanguage(iso_code=iso_code, name="Platt").full_clean()
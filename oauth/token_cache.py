@@ -0,0 +1,104 @@
+import hashlib
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractBaseUser
+from django.core.cache import cache
+from django.utils import timezone
+
+
+class TokenVerificationCache:
+    """
+    cache of verified jwt access tokens, used by OAuth2Backend
+
+    Verifying a request means checking the signature of the jwt and looking up the
+    access token it wraps in the database. The outcome (the user of the token) is
+    kept per jwt for OAUTH_TOKEN_CACHE_TTL seconds, but never beyond the expiry of
+    the token.
+
+    Every entry carries the version of its access token at the time it was
+    verified. Revoking or changing the access token bumps the version, which turns
+    all entries of the token into misses without having to know them. A missing
+    version (e.g. evicted by the cache) is treated the same way.
+    """
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @classmethod
+    def _jwt_key(cls, jwt_token: str) -> str:
+        return f"oauth-jwt:{cls._digest(jwt_token)}"
+
+    @classmethod
+    def _version_key(cls, access_token: str) -> str:
+        return f"oauth-access-token-version:{cls._digest(access_token)}"
+
+    @classmethod
+    def get(cls, jwt_token: str, access_token: str) -> Tuple[Optional[dict], str]:
+        """
+        get the verification result of a jwt, in one read from the cache
+        :param jwt_token: the encoded jwt of the request
+        :param access_token: the access token wrapped in the jwt
+        :return: dict with the user, None if the jwt isn't cached or its access token
+        changed since, and the version of the access token to store a new result with
+        """
+        jwt_key = cls._jwt_key(jwt_token)
+        version_key = cls._version_key(access_token)
+        cached = cache.get_many([jwt_key, version_key])
+        version = cached.get(version_key)
+        if version is None:
+            cache.add(version_key, uuid.uuid4().hex, settings.OAUTH_TOKEN_CACHE_TTL)
+            return None, cache.get(version_key)
+
+        entry = cached.get(jwt_key)
+        # cache timeouts are rounded to seconds, the expiry isn't
+        if (
+            entry is None
+            or entry["version"] != version
+            or entry["expires"] <= timezone.now()
+        ):
+            return None, version
+        return entry, version
+
+    @classmethod
+    def set(
+        cls,
+        jwt_token: str,
+        version: str,
+        user: AbstractBaseUser,
+        expires: datetime,
+    ):
+        """
+        remember a verified jwt
+        :param jwt_token: the encoded jwt of the request
+        :param version: the version of the access token returned by get() before the
+        token was verified
+        :param user: the user the token belongs to
+        :param expires: when the jwt or the access token expires, whatever comes first
+        """
+        timeout = min(
+            settings.OAUTH_TOKEN_CACHE_TTL,
+            int((expires - timezone.now()).total_seconds()),
+        )
+        if version is None or timeout <= 0:
+            return
+        cache.set(
+            cls._jwt_key(jwt_token),
+            {"version": version, "user": user, "expires": expires},
+            timeout,
+        )
+
+    @classmethod
+    def evict(cls, access_token: str):
+        """
+        forget all jwts of an access token
+        :param access_token: the revoked or changed access token
+        """
+        cache.set(
+            cls._version_key(access_token),
+            uuid.uuid4().hex,
+            settings.OAUTH_TOKEN_CACHE_TTL,
+        )
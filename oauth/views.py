@@ -10,26 +10,10 @@ from oauth2_provider import views
 from oauth2_provider.models import get_access_token_model
 
 from oauth2_provider_jwt.utils import generate_payload
-import jwt
-
-logger = logging.getLogger(__name__)
 
+from oauth.keys import JWTKeyRegistry, encode_jwt
 
-def encode_jwt(payload, headers=None):
-    """
-    :type payload: dict
-    :type headers: dict, None
-    :rtype: str
-    """
-    # RS256 in default, because hardcoded legacy
-    algorithm = getattr(settings, "JWT_ENC_ALGORITHM", "RS256")
-
-    private_key_name = "JWT_PRIVATE_KEY_{}".format(payload["iss"].upper())
-    private_key = getattr(settings, private_key_name, None)
-    if not private_key:
-        raise ImproperlyConfigured("Missing setting {}".format(private_key_name))
-    encoded = jwt.encode(payload, private_key, algorithm=algorithm, headers=headers)
-    return encoded
+logger = logging.getLogger(__name__)
 
 
 class TokenView(views.TokenView):
@@ -60,10 +44,8 @@ class TokenView(views.TokenView):
     @staticmethod
     def _is_jwt_config_set():
         issuer = getattr(settings, "JWT_ISSUER", "")
-        private_key_name = "JWT_PRIVATE_KEY_{}".format(issuer.upper())
-        private_key = getattr(settings, private_key_name, None)
         id_attribute = getattr(settings, "JWT_ID_ATTRIBUTE", None)
-        if issuer and private_key and id_attribute:
+        if issuer and id_attribute and JWTKeyRegistry.signing_key(issuer):
             return True
         else:
             return False
@@ -0,0 +1,168 @@
+"""
+per request DataLoaders for the graphql schema
+
+Graphene resolves the relations of a node once per parent row, so listing n teams
+with their members costs 1 + n queries and another n for the users of the members.
+The loaders collect the keys of all rows of one execution level and fetch the
+related rows with a single IN query. They are cached on the request, so every
+request batches (and caches) independently.
+"""
+from collections import defaultdict
+
+from graphene_django.filter import DjangoFilterConnectionField
+from promise import Promise
+from promise.dataloader import DataLoader
+
+
+class ModelLoader(DataLoader):
+    """loads instances of a model by primary key"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def batch_load_fn(self, keys):
+        instances = self.model._default_manager.in_bulk(keys)
+        return Promise.resolve([instances.get(key) for key in keys])
+
+
+class RelatedLoader(DataLoader):
+    """loads the instances of a model that point to a key with a foreign key"""
+
+    def __init__(self, model, field_name):
+        super().__init__()
+        self.model = model
+        self.field_name = field_name
+
+    def batch_load_fn(self, keys):
+        queryset = self.model._default_manager.filter(
+            **{f"{self.field_name}__in": keys}
+        )
+        if not queryset.ordered:
+            queryset = queryset.order_by("pk")
+
+        attname = self.model._meta.get_field(self.field_name).attname
+        related = defaultdict(list)
+        for instance in queryset:
+            related[getattr(instance, attname)].append(instance)
+        return Promise.resolve([related[key] for key in keys])
+
+
+def get_loader(info, loader_class, *args):
+    """
+    get the loader of the current request
+    :param info: the graphql resolve info
+    :param loader_class: the DataLoader class
+    :param args: the arguments of the loader, they are part of the cache key
+    :return: the loader instance
+    """
+    context = info.context
+    if context is None:
+        return loader_class(*args)
+
+    loaders = getattr(context, "_dataloaders", None)
+    if loaders is None:
+        loaders = context._dataloaders = {}
+    key = (loader_class, *args)
+    if key not in loaders:
+        loaders[key] = loader_class(*args)
+    return loaders[key]
+
+
+def load_related(info, instance, name):
+    """
+    load a foreign key or reverse foreign key relation with the loaders of the request
+
+    Relations that were already loaded (e.g. with select_related or prefetch_related)
+    are returned right away, everything else as a promise. Reverse foreign keys resolve
+    to the related manager with the loaded rows in its prefetch cache, the same way
+    prefetch_related stores them, so connection fields can keep using the manager.
+    :param info: the graphql resolve info
+    :param instance: the model instance
+    :param name: the name of the relation
+    :return: the related instance, None or the related manager (or a promise of it)
+    """
+    field = instance._meta.get_field(name)
+
+    if field.concrete and (field.many_to_one or field.one_to_one):
+        if field.is_cached(instance):
+            return getattr(instance, name)
+        value = getattr(instance, field.attname)
+        if value is None:
+            return None
+        return get_loader(info, ModelLoader, field.related_model).load(value)
+
+    if field.one_to_one:
+        if field.is_cached(instance):
+            return field.get_cached_value(instance)
+
+        def cache_one(instances):
+            related = instances[0] if instances else None
+            field.set_cached_value(instance, related)
+            if related is not None:
+                field.field.set_cached_value(related, instance)
+            return related
+
+        loader = get_loader(info, RelatedLoader, field.related_model, field.field.name)
+        return loader.load(instance.pk).then(cache_one)
+
+    if field.one_to_many:
+        cache_name = field.get_cache_name()
+        if cache_name in getattr(instance, "_prefetched_objects_cache", {}):
+            return getattr(instance, name)
+
+        def cache_many(instances):
+            for related in instances:
+                field.field.set_cached_value(related, instance)
+            manager = getattr(instance, name)
+            queryset = manager.get_queryset()
+            queryset._result_cache = instances
+            queryset._prefetch_done = True
+            if not hasattr(instance, "_prefetched_objects_cache"):
+                instance._prefetched_objects_cache = {}
+            instance._prefetched_objects_cache[cache_name] = queryset
+            return manager
+
+        loader = get_loader(info, RelatedLoader, field.related_model, field.field.name)
+        return loader.load(instance.pk).then(cache_many)
+
+    raise ValueError(f"Can't load the relation {name} of {instance._meta.label}.")
+
+
+class DataLoaderConnectionField(DjangoFilterConnectionField):
+    """
+    filter connection field whose resolver may return a promise, e.g. of load_related
+
+    The filterset only touches the database again if filter arguments are given.
+    """
+
+    @classmethod
+    def connection_resolver(
+        cls,
+        resolver,
+        connection,
+        default_manager,
+        queryset_resolver,
+        max_limit,
+        enforce_first_or_last,
+        root,
+        info,
+        **args,
+    ):
+        def resolve(iterable):
+            return super(DataLoaderConnectionField, cls).connection_resolver(
+                lambda root, info, **args: iterable,
+                connection,
+                default_manager,
+                queryset_resolver,
+                max_limit,
+                enforce_first_or_last,
+                root,
+                info,
+                **args,
+            )
+
+        iterable = resolver(root, info, **args)
+        if Promise.is_thenable(iterable):
+            return Promise.resolve(iterable).then(resolve)
+        return resolve(iterable)
@@ -0,0 +1,168 @@
+"""
+select_related/prefetch_related/only() planning from the graphql selection set
+
+optimize_queryset looks at the fields a query selects below a list or connection
+field and adds the joins and prefetches the nodes are going to need, so listing
+n rows takes a constant number of queries. Relations that were loaded this way
+are picked up by the loaders in schema_utils.dataloaders instead of being loaded
+again.
+
+Fields of a node that don't map to a model field (properties or custom resolvers)
+can name the model fields and relations they use in optimizer_hints on the node:
+
+    class InternalTeamNode(DjangoObjectType):
+        optimizer_hints = {"domain": ["slug"], "public_key": ["certificates"]}
+
+If a selected field is neither a model field nor hinted, only() isn't applied, as
+loading a deferred column costs one query per row.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from graphene.utils.str_converters import to_snake_case
+from graphql.language.ast import FragmentSpread, InlineFragment
+from graphql.type.definition import GraphQLList, GraphQLNonNull
+
+
+class QueryPlan:
+    """the lookups a queryset needs for a selection set"""
+
+    def __init__(self):
+        self.select_related = set()
+        self.prefetch_related = set()
+        self.only = {"pk"}
+        # only() can only be used if every selected field is known
+        self.restrict_fields = True
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*sorted(self.select_related))
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*sorted(self.prefetch_related))
+        if self.restrict_fields:
+            queryset = queryset.only(*sorted(self.only))
+        return queryset
+
+
+def _unwrap(graphql_type):
+    while isinstance(graphql_type, (GraphQLList, GraphQLNonNull)):
+        graphql_type = graphql_type.of_type
+    return graphql_type
+
+
+def _selected_fields(selection_set, info):
+    """the field nodes of a selection set, including the ones of fragments"""
+    if selection_set is None:
+        return
+    for selection in selection_set.selections:
+        if isinstance(selection, FragmentSpread):
+            fragment = info.fragments[selection.name.value]
+            yield from _selected_fields(fragment.selection_set, info)
+        elif isinstance(selection, InlineFragment):
+            yield from _selected_fields(selection.selection_set, info)
+        else:
+            yield selection
+
+
+def _node_selection(graphql_type, selection_set, info):
+    """
+    get the node type and the fields selected on it, following edges { node }
+    if the type is a connection
+    :return: tuple of the graphql node type and the list of selected field nodes
+    """
+    graphql_type = _unwrap(graphql_type)
+    fields = getattr(graphql_type, "fields", {})
+    if "edges" not in fields or "pageInfo" not in fields:
+        return graphql_type, list(_selected_fields(selection_set, info))
+
+    node_type = _unwrap(_unwrap(fields["edges"].type).fields["node"].type)
+    selected = []
+    for edges in _selected_fields(selection_set, info):
+        if edges.name.value != "edges":
+            continue
+        for node in _selected_fields(edges.selection_set, info):
+            if node.name.value == "node":
+                selected.extend(_selected_fields(node.selection_set, info))
+    return node_type, selected
+
+
+def _get_field(model, name):
+    """get a model field by name, reverse relations by their accessor name"""
+    for related_object in model._meta.related_objects:
+        if related_object.get_accessor_name() == name:
+            return related_object
+    return model._meta.get_field(name)
+
+
+def _plan_relation(plan, model_field, lookup, prefetched):
+    if not prefetched and (model_field.many_to_one or model_field.one_to_one):
+        plan.select_related.add(lookup)
+        return False
+    plan.prefetch_related.add(lookup)
+    return True
+
+
+def _plan(plan, model, node_type, fields, info, prefix="", prefetched=False):
+    graphene_type = getattr(node_type, "graphene_type", None)
+    hints = getattr(graphene_type, "optimizer_hints", {})
+    root = not prefix
+
+    for field_node in fields:
+        graphql_name = field_node.name.value
+        if graphql_name.startswith("__"):
+            continue
+        name = to_snake_case(graphql_name)
+
+        for hint in hints.get(name, []):
+            model_field = _get_field(model, hint)
+            if model_field.is_relation:
+                _plan_relation(plan, model_field, prefix + hint, prefetched)
+                if root and model_field.concrete and not model_field.many_to_many:
+                    plan.only.add(hint)
+            elif root:
+                plan.only.add(hint)
+
+        if name == "id":
+            continue
+        try:
+            model_field = _get_field(model, name)
+        except FieldDoesNotExist:
+            if root and name not in hints:
+                plan.restrict_fields = False
+            continue
+
+        if not model_field.is_relation:
+            if root:
+                plan.only.add(name)
+            continue
+
+        if root and model_field.concrete and not model_field.many_to_many:
+            plan.only.add(name)
+        related_prefetched = _plan_relation(
+            plan, model_field, prefix + name, prefetched
+        )
+        related_type, related_fields = _node_selection(
+            node_type.fields[graphql_name].type, field_node.selection_set, info
+        )
+        _plan(
+            plan,
+            model_field.related_model,
+            related_type,
+            related_fields,
+            info,
+            prefix=f"{prefix}{name}__",
+            prefetched=related_prefetched,
+        )
+
+
+def optimize_queryset(queryset, info):
+    """
+    add the select_related, prefetch_related and only calls the selection needs
+    :param queryset: the queryset returned by a list or connection resolver
+    :param info: the graphql resolve info of that resolver
+    :return: the optimized queryset
+    """
+    plan = QueryPlan()
+    node_type, fields = _node_selection(
+        info.return_type, info.field_asts[0].selection_set, info
+    )
+    _plan(plan, queryset.model, node_type, fields, info)
+    return plan.apply(queryset)
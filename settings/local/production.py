@@ -45,3 +45,6 @@ AWS_S3_REGION_NAME = "eu-central-1"
 AWS_ACCESS_KEY_ID = os.environ.get("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.environ.get("AWS_SECRET_ACCESS_KEY")
 AWS_STORAGE_BUCKET_NAME = os.environ.get("AWS_BUCKET_NAME")
+
+# "forms.services.signing.ProcessPoolSigningBackend" on hosts with spare cores
+FORM_SIGNING_BACKEND = environ.get("FORM_SIGNING_BACKEND", FORM_SIGNING_BACKEND)
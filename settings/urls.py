@@ -25,7 +25,13 @@ from graphene_file_upload.django import FileUploadGraphQLView
 import json
 from rest_framework.exceptions import NotAuthenticated
 
-from forms.views import pgp_signature_key, home
+from forms.views import (
+    pgp_signature_key,
+    home,
+    form_bundle,
+    translation_catalog,
+    export_submissions,
+)
 
 from oauth2_provider import urls as oauth2_provider_urls
 
@@ -48,6 +54,13 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("graphql/", csrf_exempt(FileUploadGraphQLView.as_view(graphiql=True))),
     path("pgp-signature-key.txt", pgp_signature_key),
+    path("forms/<str:form_id>/bundle.json", form_bundle, name="form-bundle"),
+    path(
+        "forms/<str:form_id>/translations/<str:locale>.json",
+        translation_catalog,
+        name="translation-catalog",
+    ),
+    path("submissions/export", export_submissions, name="export-submissions"),
     path(r"oauth/", include(("oauth.urls", "oauth"), namespace="oauth2_provider")),
     path("accounts/", include("django.contrib.auth.urls")),
     path("", home),
@@ -7,6 +7,7 @@ from django.utils.translation import gettext as _
 # ValidationError and _ are imported so you can raise auto-translated errors
 # inside custom validation functions.
 from teams.models import Team, TeamMembership, EncryptionKey, TeamMembershipAccessKey
+from teams.utils import get_pgp_fingerprint
 
 
 class CreateTeamForm(forms.ModelForm):
@@ -28,6 +29,14 @@ class CreateEncryptionKeyForm(forms.ModelForm):
         model = EncryptionKey
         fields = ["user", "key_name", "public_key"]
 
+    def clean_public_key(self):
+        public_key = self.cleaned_data["public_key"]
+        try:
+            get_pgp_fingerprint(public_key)
+        except ValueError:
+            raise ValidationError(_("This is not a valid pgp public key."))
+        return public_key
+
 
 class UpdateEncryptionKeyForm(forms.ModelForm):
     class Meta:
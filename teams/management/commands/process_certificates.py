@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from teams.services import TeamCertificateService
+
+
+class Command(BaseCommand):
+    """
+    A worker issuing the queued team certificates via ACME
+    """
+
+    help = "A worker issuing the queued team certificates via ACME"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="exit as soon as the queue is empty",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="seconds to wait before looking at an empty queue again",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = TeamCertificateService.process_certificates()
+            if processed:
+                self.stdout.write(f"processed {processed} certificate(s)")
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
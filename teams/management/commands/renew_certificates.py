@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from teams.services import TeamCertificateService
+
+
+class Command(BaseCommand):
+    """
+    A command renewing the team certificates that expire soon, meant to be run daily
+    """
+
+    help = "A command renewing the team certificates that expire soon, meant to be run daily"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.CERTIFICATE_RENEWAL_DAYS,
+            help="renew certificates expiring within this many days",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.CERTIFICATE_RENEWAL_WORKERS,
+            help="number of certificates issued at the same time",
+        )
+
+    def handle(self, *args, **options):
+        backlog = TeamCertificateService.renew_certificates(
+            options["days"], options["workers"]
+        )
+        for key, value in backlog.items():
+            self.stdout.write(f"{key}: {value}")
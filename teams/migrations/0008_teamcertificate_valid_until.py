@@ -0,0 +1,35 @@
+# Generated by Django 3.2.2 on 2026-10-18 08:28
+
+from django.db import migrations, models
+from django.utils import timezone
+
+from teams.utils import get_cert_valid_until
+
+
+def store_valid_until(apps, schema_editor):
+    TeamCertificate = apps.get_model("teams", "TeamCertificate")
+    for certificate in TeamCertificate.objects.exclude(certificate=None).exclude(
+        certificate=""
+    ):
+        certificate.valid_until = timezone.make_aware(
+            get_cert_valid_until(certificate.certificate), timezone.utc
+        )
+        certificate.save(update_fields=["valid_until"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("teams", "0007_auto_20210509_1258"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="teamcertificate",
+            name="valid_until",
+            field=models.DateTimeField(
+                blank=True, db_index=True, editable=False, null=True
+            ),
+        ),
+        migrations.RunPython(store_valid_until, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.2 on 2026-10-18 08:30
+
+from django.db import migrations, models
+
+from teams.utils import get_pgp_fingerprint
+
+
+def store_fingerprints(apps, schema_editor):
+    EncryptionKey = apps.get_model("teams", "EncryptionKey")
+    for key in EncryptionKey.objects.filter(fingerprint=""):
+        try:
+            key.fingerprint = get_pgp_fingerprint(key.public_key)
+        except ValueError:
+            # keys stored before they were validated, they can't be looked up
+            continue
+        key.save(update_fields=["fingerprint"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("teams", "0008_teamcertificate_valid_until"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="encryptionkey",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=60
+            ),
+        ),
+        migrations.RunPython(store_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 3.2.2 on 2026-10-18 09:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("teams", "0009_encryptionkey_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="teamcertificate",
+            name="attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="teamcertificate",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="teamcertificate",
+            name="contact_email",
+            field=models.EmailField(blank=True, default="", max_length=254),
+        ),
+        migrations.AddField(
+            model_name="teamcertificate",
+            name="error",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AlterField(
+            model_name="teamcertificate",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("active", "active"),
+                    ("waiting for certificate", "waiting for certificate"),
+                    ("queued", "queued"),
+                    ("pending", "pending"),
+                    ("failed", "failed"),
+                ],
+                default="queued",
+                max_length=30,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="teamcertificate",
+            index=models.Index(
+                fields=["status", "created_at"], name="certificate_job_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.2 on 2026-10-18 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("teams", "0010_certificate_jobs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AcmeAccount",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("directory_url", models.URLField(max_length=255)),
+                (
+                    "contact_email",
+                    models.EmailField(blank=True, default="", max_length=254),
+                ),
+                ("key", models.TextField()),
+                ("registration", models.TextField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="acmeaccount",
+            constraint=models.UniqueConstraint(
+                fields=("directory_url", "contact_email"), name="unique_acme_account"
+            ),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.2 on 2026-10-18 09:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("teams", "0011_acmeaccount"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="teamcertificate",
+            name="renews",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="renewals",
+                to="teams.teamcertificate",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="teamcertificate",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("active", "active"),
+                    ("waiting for certificate", "waiting for certificate"),
+                    ("queued", "queued"),
+                    ("pending", "pending"),
+                    ("failed", "failed"),
+                    ("replaced", "replaced"),
+                ],
+                default="queued",
+                max_length=30,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="teamcertificate",
+            index=models.Index(
+                fields=["status", "valid_until"], name="certificate_expiry_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.2 on 2026-10-18 09:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("teams", "0012_certificate_renewal"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="teamcertificate",
+            name="next_attempt_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.2 on 2026-10-18 09:50
+
+import josepy
+from cryptography.hazmat.primitives import serialization
+from django.conf import settings
+from django.db import migrations
+
+
+def encrypt_account_keys(apps, schema_editor):
+    """the account keys were stored as plain jwk json"""
+    AcmeAccount = apps.get_model("teams", "AcmeAccount")
+    for account in AcmeAccount.objects.exclude(key__startswith="-----BEGIN"):
+        keypair = josepy.JWKRSA.json_loads(account.key)
+        account.key = keypair.key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.BestAvailableEncryption(settings.SECRET_KEY.encode()),
+        ).decode()
+        account.save(update_fields=["key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("teams", "0013_certificate_backoff"),
+    ]
+
+    operations = [
+        migrations.RunPython(encrypt_account_keys, migrations.RunPython.noop),
+    ]
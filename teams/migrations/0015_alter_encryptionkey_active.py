@@ -0,0 +1,18 @@
+# Generated by Django 3.2.2 on 2026-10-18 10:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("teams", "0014_encrypt_acme_account_keys"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="encryptionkey",
+            name="active",
+            field=models.BooleanField(default=False),
+        ),
+    ]
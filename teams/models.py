@@ -3,12 +3,12 @@ import pgpy
 from autoslug import AutoSlugField
 from django.conf import settings
 from django.db import models
-from django.db.models import Q
+from django.db.models import F, Q
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 
 # Create your models here.
-from teams.utils import cert_to_jwk, get_cert_valid_until
+from teams.utils import cert_to_jwk
 
 
 class EncryptionKey(models.Model):
@@ -19,12 +19,10 @@ class EncryptionKey(models.Model):
     public_key = models.TextField()
     active = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
-
-    @property
-    def fingerprint(self) -> str:
-        pkey = pgpy.PGPKey()
-        pkey.parse(self.public_key)
-        return pkey.fingerprint
+    # pgp fingerprint of the public key, computed once when the key is stored
+    fingerprint = models.CharField(
+        max_length=60, blank=True, editable=False, db_index=True
+    )
 
     def __str__(self):
         return f"{self.fingerprint} ({self.user.username})"
@@ -33,6 +31,12 @@ class EncryptionKey(models.Model):
 class TeamStatus(models.TextChoices):
     ACTIVE = "active", _("active")
     WAITING_FOR_CERTIFICATE = "waiting for certificate", _("waiting for certificate")
+    # issuance by the certificate worker (manage.py process_certificates)
+    QUEUED = "queued", _("queued")
+    PENDING = "pending", _("pending")
+    FAILED = "failed", _("failed")
+    # superseded by its renewal
+    REPLACED = "replaced", _("replaced")
 
 
 class Team(models.Model):
@@ -46,7 +50,20 @@ class Team(models.Model):
 
     @property
     def public_key(self) -> str:
-        certificate = self.certificates.filter(status=TeamStatus.ACTIVE).first()
+        if "certificates" in getattr(self, "_prefetched_objects_cache", {}):
+            # use the already loaded certificates instead of querying again
+            certificate = max(
+                (c for c in self.certificates.all() if c.status == TeamStatus.ACTIVE),
+                key=lambda c: (c.valid_until is not None, c.valid_until or 0),
+                default=None,
+            )
+        else:
+            # the newest one if a renewal was activated in the meantime
+            certificate = (
+                self.certificates.filter(status=TeamStatus.ACTIVE)
+                .order_by(F("valid_until").desc(nulls_last=True))
+                .first()
+            )
         if certificate:
             return cert_to_jwk(certificate.certificate, certificate.public_key)
         return None
@@ -64,17 +81,37 @@ class TeamCertificate(models.Model):
     certificate = models.TextField(null=True)
     status = models.CharField(
         choices=TeamStatus.choices,
-        default=TeamStatus.WAITING_FOR_CERTIFICATE,
+        default=TeamStatus.QUEUED,
         max_length=30,
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # expiry of the certificate chain, set whenever the certificate gets written
+    valid_until = models.DateTimeField(
+        null=True, blank=True, editable=False, db_index=True
+    )
+    # state of the issuance job
+    contact_email = models.EmailField(blank=True, default="")
+    attempts = models.PositiveIntegerField(default=0)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    # failed attempts are retried with an exponential backoff
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    # the expiring certificate this one replaces once it is active
+    renews = models.ForeignKey(
+        "self",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="renewals",
+    )
 
-    @property
-    def valid_until(self) -> datetime:
-        certificate = self.certificate
-        if certificate:
-            return get_cert_valid_until(certificate)
-        return None
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="certificate_job_idx"),
+            models.Index(
+                fields=["status", "valid_until"], name="certificate_expiry_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.team} ({self.status})"
@@ -106,3 +143,26 @@ class TeamMembershipAccessKey(models.Model):
     encryption_key = models.ForeignKey(
         EncryptionKey, on_delete=models.CASCADE, related_name="access_keys"
     )
+
+
+class AcmeAccount(models.Model):
+    """an acme account, reused for all certificates of a contact email"""
+
+    directory_url = models.URLField(max_length=255)
+    contact_email = models.EmailField(blank=True, default="")
+    # the private account key as pem, encrypted with the SECRET_KEY like the
+    # signature keys
+    key = models.TextField()
+    # the registration resource returned by the acme server, as json
+    registration = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["directory_url", "contact_email"], name="unique_acme_account"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.contact_email} ({self.directory_url})"
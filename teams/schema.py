@@ -11,6 +11,7 @@ from serious_django_graphene import (
     MutationExecutionException,
 )
 from graphql_relay.node.node import from_global_id
+from promise import Promise
 
 from graphql_relay.node.node import from_global_id
 from graphene_django.filter import DjangoFilterConnectionField
@@ -31,6 +32,8 @@ from teams.models import (
 )
 
 from teams.services import TeamService, TeamMembershipService, EncryptionKeyService
+from schema_utils.dataloaders import DataLoaderConnectionField, load_related
+from schema_utils.optimizer import optimize_queryset
 
 from serious_django_graphene import (
     get_user_from_info,
@@ -43,12 +46,32 @@ class InternalTeamNode(DjangoObjectType):
 
     domain = graphene.Field(graphene.String)
     public_key = graphene.Field(graphene.String)
+    certificates = DataLoaderConnectionField(
+        lambda: InternalTeamCertificateNode, required=True
+    )
+    members = DataLoaderConnectionField(
+        lambda: InternalTeamMembershipNode, required=True
+    )
+
+    optimizer_hints = {"domain": ["slug"], "public_key": ["certificates"]}
 
     class Meta:
         model = Team
         filter_fields = ["id"]
         interfaces = (relay.Node,)
 
+    def resolve_certificates(self, info, **kwargs):
+        return load_related(info, self, "certificates")
+
+    def resolve_members(self, info, **kwargs):
+        return load_related(info, self, "members")
+
+    def resolve_public_key(self, info):
+        # Team.public_key picks the active certificate from the loaded ones
+        return Promise.resolve(load_related(info, self, "certificates")).then(
+            lambda certificates: self.public_key
+        )
+
     @classmethod
     @permissions_checker([IsAuthenticated])
     def get_node(cls, info, id):
@@ -67,6 +90,9 @@ class InternalTeamCertificateNode(DjangoObjectType):
         filter_fields = ["id"]
         interfaces = (relay.Node,)
 
+    def resolve_team(self, info):
+        return load_related(info, self, "team")
+
     @classmethod
     @permissions_checker([IsAuthenticated])
     def get_node(cls, info, id):
@@ -83,6 +109,12 @@ class InternalTeamMembershipNode(DjangoObjectType):
         filter_fields = ["id"]
         interfaces = (relay.Node,)
 
+    def resolve_user(self, info):
+        return load_related(info, self, "user")
+
+    def resolve_team(self, info):
+        return load_related(info, self, "team")
+
     @classmethod
     @permissions_checker([IsAuthenticated])
     def get_node(cls, info, id):
@@ -112,6 +144,15 @@ class InactiveEncryptionKeyNode(PermissionDjangoObjectType):
         filter_fields = ["id"]
         interfaces = (relay.Node,)
 
+    def resolve_user(self, info):
+        return load_related(info, self, "user")
+
+
+class RecipientKeyNode(ObjectType):
+    """public key (jwk) of a team that receives the submissions of a form"""
+
+    public_key = graphene.String()
+
 
 class Query(graphene.ObjectType):
     # get a list of available teams
@@ -123,25 +164,41 @@ class Query(graphene.ObjectType):
         InactiveEncryptionKeyNode
     )
 
+    # find a single key by its fingerprint
+    encryption_key_by_fingerprint = graphene.Field(
+        InactiveEncryptionKeyNode, fingerprint=graphene.String(required=True)
+    )
+
     # get public keys for form
     public_keys_for_form = graphene.List(
-        EncryptionKeyNode, form_id=graphene.ID(required=True)
+        RecipientKeyNode, form_id=graphene.ID(required=True)
     )
 
     def resolve_public_keys_for_form(self, info, form_id):
-        return FormService.retrieve_public_keys_for_form(
-            int(from_global_id(form_id)[1])
-        )
+        return [
+            {"public_key": public_key}
+            for public_key in FormService.retrieve_public_keys_for_form(
+                int(from_global_id(form_id)[1])
+            )
+        ]
+
+    @permissions_checker([IsAuthenticated])
+    def resolve_encryption_key_by_fingerprint(self, info, fingerprint):
+        user = get_user_from_info(info)
+        try:
+            return EncryptionKeyService.retrieve_key_by_fingerprint(user, fingerprint)
+        except EncryptionKeyService.exceptions:
+            return None
 
     @permissions_checker([IsAuthenticated, CanActivateEncryptionKeyPermission])
     def resolve_all_inactive_encryption_keys(self, info, **kwargs):
         user = get_user_from_info(info)
-        return EncryptionKey.objects.filter(active=False)
+        return optimize_queryset(EncryptionKey.objects.filter(active=False), info)
 
     @permissions_checker([IsAuthenticated])
     def resolve_all_teams(self, info, **kwargs):
         user = get_user_from_info(info)
-        return Team.objects.all()
+        return optimize_queryset(Team.objects.all(), info)
 
 
 class EncryptionKeysInputType(graphene.InputObjectType):
@@ -223,6 +280,59 @@ class AddTeamMember(FailableMutation):
         return AddTeamMember(success=True, membership=result)
 
 
+class TeamMemberInputType(graphene.InputObjectType):
+    invited_user_id = graphene.ID(required=True)
+    keys = graphene.List(EncryptionKeysInputType)
+    role = TeamRoleChoicesSchema()
+
+
+class TeamMemberErrorType(ObjectType):
+    invited_user_id = graphene.ID(required=True)
+    message = graphene.String(required=True)
+
+
+class AddTeamMembers(FailableMutation):
+    memberships = graphene.List(InternalTeamMembershipNode)
+    member_errors = graphene.List(TeamMemberErrorType)
+
+    class Arguments:
+        team_id = graphene.ID(required=True)
+        members = graphene.List(TeamMemberInputType, required=True)
+
+    @permissions_checker([IsAuthenticated, CanEditFormPermission])
+    def mutate(self, info, team_id, members):
+        user = get_user_from_info(info)
+        global_ids = {}
+        c_members = []
+        for member in members:
+            invited_user_id = int(from_global_id(member["invited_user_id"])[1])
+            global_ids[invited_user_id] = member["invited_user_id"]
+            c_keys = {}
+            for key in member.get("keys") or []:
+                c_keys[int(from_global_id(key["encryption_key_id"])[1])] = key["key"]
+            c_members.append(
+                {
+                    "invited_user_id": invited_user_id,
+                    "keys": c_keys,
+                    "role": member.get("role"),
+                }
+            )
+        try:
+            result, errors = TeamMembershipService.add_members(
+                user, team_id=int(from_global_id(team_id)[1]), members=c_members
+            )
+        except TeamMembershipService.exceptions as e:
+            raise MutationExecutionException(str(e))
+        return AddTeamMembers(
+            success=True,
+            memberships=result,
+            member_errors=[
+                TeamMemberErrorType(invited_user_id=global_ids[user_id], message=error)
+                for user_id, error in errors.items()
+            ],
+        )
+
+
 class UpdateTeamMember(FailableMutation):
     membership = graphene.Field(InternalTeamMembershipNode)
 
@@ -289,6 +399,8 @@ class MembershipAccessKeyInputType(graphene.InputObjectType):
 
 class ActivateEncryptionKey(FailableMutation):
     encryption_key = graphene.Field(InactiveEncryptionKeyNode)
+    # memberships of the key owner that didn't get an encrypted key
+    missing_memberships = graphene.List(InternalTeamMembershipNode)
 
     class Arguments:
         public_key_id = graphene.ID(required=True)
@@ -304,9 +416,14 @@ class ActivateEncryptionKey(FailableMutation):
             result = EncryptionKeyService.activate_key(
                 user, int(from_global_id(public_key_id)[1]), keys=c_keys
             )
+            missing = EncryptionKeyService.retrieve_memberships_without_key(
+                user, result.pk
+            )
         except EncryptionKeyService.exceptions as e:
             raise MutationExecutionException(str(e))
-        return ActivateEncryptionKey(success=True, encryption_key=result)
+        return ActivateEncryptionKey(
+            success=True, encryption_key=result, missing_memberships=missing
+        )
 
 
 class RemoveEncryptionKey(FailableMutation):
@@ -333,6 +450,7 @@ class Mutation(graphene.ObjectType):
     create_team = CreateTeam.Field()
     add_csr_for_team = AddCSRForTeam.Field()
     add_team_member = AddTeamMember.Field()
+    add_team_members = AddTeamMembers.Field()
     update_team_member = UpdateTeamMember.Field()
     remove_team_member = RemoveTeamMember.Field()
 
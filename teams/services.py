@@ -1,19 +1,27 @@
 import josepy
 import json
+import logging
+import threading
+import time
 import requests
 from acme import challenges
 from acme.client import ClientV2, ClientNetwork
-from acme.messages import Directory, Registration
+from acme.messages import Directory, Registration, RegistrationResource
 from certbot._internal.client import acme_from_config_key
 from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
 from django.contrib.auth.models import AbstractUser, User
-from django.db import transaction
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
 from josepy import JWKRSA
 from letsencrypt.models import AcmeChallenge
 from serious_django_services import Service, CRUDMixin, NotPassed
 from cryptography.hazmat.primitives.asymmetric.rsa import generate_private_key
 from django.conf import settings
-from typing import Dict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
 
 from forms.services.forms import FormServiceException
 from teams.forms import (
@@ -27,6 +35,7 @@ from teams.forms import (
     UpdateTeamMembershipAccessKeyForm,
 )
 from teams.models import (
+    AcmeAccount,
     Team,
     TeamRoleChoices,
     TeamMembership,
@@ -35,6 +44,7 @@ from teams.models import (
     EncryptionKey,
     TeamMembershipAccessKey,
 )
+from teams.utils import get_pgp_fingerprint, normalize_pgp_fingerprint
 from teams.permissions import (
     CanCreateTeamPermission,
     CanRemoveTeamMemberPermission,
@@ -42,6 +52,8 @@ from teams.permissions import (
     CanAddEncryptionKeyPermission,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class TeamServiceException(Exception):
     pass
@@ -114,6 +126,58 @@ class TeamService(Service, CRUDMixin):
         return cls._retrieve(id)
 
 
+class TeamMembershipIndex:
+    """
+    the roles of a team needed for authorization checks, loaded in one query
+
+    Indexes are kept on the user object per team, i.e. for the rest of the request,
+    until any team membership changes (see teams.signals).
+    """
+
+    _generation = 0
+
+    def __init__(self, member_count: int, admin_count: int, role: str = None):
+        self.member_count = member_count
+        self.admin_count = admin_count
+        self.role = role
+
+    @property
+    def is_member(self) -> bool:
+        return self.role is not None
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == TeamRoleChoices.ADMIN
+
+    @classmethod
+    def load(cls, user: AbstractUser, team_id: int) -> "TeamMembershipIndex":
+        """
+        get the index of a team as seen by a user
+        :param user: the user whose role should be looked up
+        :param team_id: id of the team
+        :return: the (cached) index
+        """
+        indexes = getattr(user, "_team_membership_indexes", None)
+        if indexes is None or indexes[0] != cls._generation:
+            indexes = (cls._generation, {})
+            user._team_membership_indexes = indexes
+
+        if team_id not in indexes[1]:
+            indexes[1][team_id] = cls(
+                **TeamMembership.objects.filter(team_id=team_id).aggregate(
+                    member_count=Count("pk"),
+                    admin_count=Count("pk", filter=Q(role=TeamRoleChoices.ADMIN)),
+                    role=Max("role", filter=Q(user_id=user.pk)),
+                )
+            )
+        return indexes[1][team_id]
+
+    @classmethod
+    def invalidate(cls):
+        """drop all loaded indexes"""
+        cls._generation += 1
+
+
 class TeamMembershipService(Service, CRUDMixin):
     service_exceptions = (TeamServiceException,)
 
@@ -187,14 +251,15 @@ class TeamMembershipService(Service, CRUDMixin):
         """
 
         team = TeamService.retrieve(user, team_id)
+        index = TeamMembershipIndex.load(user, team.pk)
 
         if (
             not (
                 user.has_perm(CanCreateTeamPermission)
-                and team.members.count() == 0
+                and index.member_count == 0
                 and invited_user_id == user.pk
             )
-            and not team.members.filter(user=user, role=TeamRoleChoices.ADMIN).exists()
+            and not index.is_admin
         ):
             raise TeamServiceException(
                 "You don't have the permission to add a new team member"
@@ -215,6 +280,90 @@ class TeamMembershipService(Service, CRUDMixin):
 
         return team_membership
 
+    @classmethod
+    @transaction.atomic
+    def add_members(
+        cls, user: AbstractUser, team_id: int, members: List[dict]
+    ) -> Tuple[List[TeamMembership], Dict[int, str]]:
+        """
+        adds many users to a team at once, users that can't be added are skipped
+        :param user: user calling the service (needs to be admin of the team)
+        :param team_id: the id of the team the users should be added to
+        :param members: dicts with the invited_user_id, the encrypted keys for
+                        this member and optionally the role
+        :return: the new memberships and the errors by invited user id
+        """
+        team = TeamService.retrieve(user, team_id)
+        if not TeamMembershipIndex.load(user, team.pk).is_admin:
+            raise TeamServiceException(
+                "You don't have the permission to add a new team member"
+            )
+
+        user_ids = [member["invited_user_id"] for member in members]
+        existing_users = set(
+            User.objects.filter(pk__in=user_ids).values_list("pk", flat=True)
+        )
+        existing_members = set(
+            team.members.filter(user__in=user_ids).values_list("user_id", flat=True)
+        )
+        active_keys = {}
+        for user_id, key_id in EncryptionKey.objects.filter(
+            user__in=user_ids, active=True
+        ).values_list("user_id", "id"):
+            active_keys.setdefault(user_id, set()).add(key_id)
+
+        errors = {}
+        valid = {}
+        for member in members:
+            user_id = member["invited_user_id"]
+            keys = member["keys"]
+            role = member.get("role") or TeamRoleChoices.MEMBER
+            missing_keys = active_keys.get(user_id, set()) - set(keys)
+            unknown_keys = set(keys) - active_keys.get(user_id, set())
+            if user_id in valid or user_id in errors:
+                errors[user_id] = "The user has been passed more than once."
+            elif user_id not in existing_users:
+                errors[user_id] = "The user doesn't exist."
+            elif user_id in existing_members:
+                errors[user_id] = "The user is already in the team."
+            elif role not in TeamRoleChoices.values:
+                errors[user_id] = f"The role '{role}' doesn't exist."
+            elif missing_keys:
+                errors[user_id] = (
+                    f"There hasn't been provided an internal key for the id "
+                    f"'{min(missing_keys)}'"
+                )
+            elif unknown_keys:
+                errors[user_id] = (
+                    f"The key id {min(unknown_keys)} is not assigned to the user "
+                    f"affected"
+                )
+            else:
+                valid[user_id] = (role, keys)
+        for user_id in errors:
+            valid.pop(user_id, None)
+
+        if not valid:
+            return [], errors
+
+        TeamMembership.objects.bulk_create(
+            TeamMembership(team=team, user_id=user_id, role=role)
+            for user_id, (role, keys) in valid.items()
+        )
+        # not every database returns the primary keys of bulk inserted rows
+        memberships = list(team.members.filter(user__in=valid.keys()))
+        TeamMembershipAccessKey.objects.bulk_create(
+            TeamMembershipAccessKey(
+                membership=membership, encryption_key_id=key_id, key=key
+            )
+            for membership in memberships
+            for key_id, key in valid[membership.user_id][1].items()
+        )
+        # bulk_create doesn't send post_save
+        TeamMembershipIndex.invalidate()
+
+        return memberships, errors
+
     @classmethod
     def update_member(
         cls,
@@ -231,23 +380,23 @@ class TeamMembershipService(Service, CRUDMixin):
         :return: team membership object
         """
         team = TeamService.retrieve(user, team_id)
+        index = TeamMembershipIndex.load(user, team.pk)
 
-        if not team.members.filter(user=user, role=TeamRoleChoices.ADMIN).exists():
+        if not index.is_admin:
             raise TeamServiceException(
                 "You don't have the permission to edit a team member."
             )
 
-        if not team.members.filter(user=affected_user_id).exists():
+        membership = team.members.filter(user=affected_user_id).first()
+        if membership is None:
             raise TeamServiceException(
                 "This user is not in the team you want to change."
             )
 
-        membership = team.members.filter(user=affected_user_id).get()
-
         if (
             role == TeamRoleChoices.MEMBER
             and membership.role == TeamRoleChoices.ADMIN
-            and team.members.filter(role=TeamRoleChoices.ADMIN).count() == 1
+            and index.admin_count == 1
         ):
             raise TeamServiceException(
                 "This user can't become a member because every team needs at least one admin."
@@ -276,10 +425,9 @@ class TeamMembershipService(Service, CRUDMixin):
         """
 
         team = TeamService.retrieve(user, team_id)
+        index = TeamMembershipIndex.load(user, team.pk)
 
-        if not team.members.filter(
-            user=user, role=TeamRoleChoices.ADMIN
-        ).exists() and not user.has_perm(CanRemoveTeamMemberPermission):
+        if not index.is_admin and not user.has_perm(CanRemoveTeamMemberPermission):
             raise TeamServiceException(
                 "You don't have the permission to remove a team member."
                 "You must be either team admin or have the permission 'CanRemoveTeamMemberPermission'."
@@ -287,10 +435,7 @@ class TeamMembershipService(Service, CRUDMixin):
 
         membership = team.members.filter(user=affected_user_id).get()
 
-        if (
-            team.members.filter(role=TeamRoleChoices.ADMIN).count() == 1
-            and membership.role == TeamRoleChoices.ADMIN
-        ):
+        if index.admin_count == 1 and membership.role == TeamRoleChoices.ADMIN:
             raise TeamServiceException(
                 "This user can't be removed because every team needs at least one admin."
             )
@@ -330,30 +475,225 @@ class TeamCertificateService(Service):
     @classmethod
     def create_certificate(
         cls, team: Team, csr: str, public_key: str, contact_email: str
-    ):
+    ) -> TeamCertificate:
         """
-        generate a new certificate for a team based on a csr
+        queue a new certificate for a team based on a csr, it is issued by
+        process_certificates in the background
         :param team: the teamobject the certificate should be generated for
         :param csr: the csr request
         :param public_key: the public key for the csr
         :param contact_email: the contact email mentioned in the csr
-        :return: the certificate object
-        """
-        cert = TeamCertificate.objects.create(team=team, public_key=public_key, csr=csr)
-        if settings.TESTING:
-            cert.status = TeamStatus.ACTIVE
-            cert.save()
-            return cert.public_key
-        acme = ACMEService.register_account(contact_email)
-        challenge, validation = acme.new_order(csr)
-        challenge = AcmeChallenge.objects.create(
-            challenge=challenge, response=validation
+        :return: the queued certificate object
+        """
+        return TeamCertificate.objects.create(
+            team=team,
+            public_key=public_key,
+            csr=csr,
+            contact_email=contact_email or "",
+            status=TeamStatus.QUEUED,
+        )
+
+    @classmethod
+    def claim_certificate(cls) -> Optional[TeamCertificate]:
+        """
+        take the oldest queued certificate that is due (or one whose worker timed out)
+        for issuance
+        :return: the claimed certificate, None if there is nothing to do
+        """
+        now = timezone.now()
+        stale = Q(
+            status=TeamStatus.PENDING,
+            claimed_at__lt=now - timedelta(seconds=settings.ACME_JOB_TIMEOUT),
+        )
+        TeamCertificate.objects.filter(
+            stale, attempts__gte=settings.ACME_JOB_MAX_ATTEMPTS
+        ).update(status=TeamStatus.FAILED, error="The issuance timed out.")
+
+        due = Q(status=TeamStatus.QUEUED) & (
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now)
+        )
+        candidates = (
+            TeamCertificate.objects.filter(due | stale)
+            .order_by("created_at")
+            .values_list("pk", "status", "claimed_at")[:10]
+        )
+        for pk, status, claimed_at in candidates:
+            # only one worker gets the row, the others see it changed
+            claimed = TeamCertificate.objects.filter(
+                pk=pk, status=status, claimed_at=claimed_at
+            ).update(
+                status=TeamStatus.PENDING,
+                claimed_at=now,
+                attempts=F("attempts") + 1,
+            )
+            if claimed:
+                return TeamCertificate.objects.get(pk=pk)
+        return None
+
+    @classmethod
+    def issue_certificate(cls, certificate: TeamCertificate) -> TeamCertificate:
+        """
+        run the acme flow for a claimed certificate, failed attempts are queued
+        again with an exponential backoff until ACME_JOB_MAX_ATTEMPTS is reached
+        :param certificate: the certificate returned by claim_certificate
+        :return: the active, queued or failed certificate
+        """
+        try:
+            acme = ACMEService.register_account(certificate.contact_email)
+            challenge, validation = acme.new_order(certificate.csr)
+            AcmeChallenge.objects.create(challenge=challenge, response=validation)
+            certificate.certificate = acme.retrieve_certificate()
+        except Exception as e:
+            certificate.error = str(e) or e.__class__.__name__
+            if certificate.attempts < settings.ACME_JOB_MAX_ATTEMPTS:
+                certificate.status = TeamStatus.QUEUED
+                certificate.next_attempt_at = timezone.now() + cls.retry_delay(
+                    certificate.attempts
+                )
+            else:
+                certificate.status = TeamStatus.FAILED
+        else:
+            certificate.error = ""
+            certificate.status = TeamStatus.ACTIVE
+
+        with transaction.atomic():
+            # switch to the renewal in one step, readers see either certificate
+            # active but never both
+            if certificate.status == TeamStatus.ACTIVE and certificate.renews_id:
+                TeamCertificate.objects.select_for_update().filter(
+                    pk=certificate.renews_id, status=TeamStatus.ACTIVE
+                ).update(status=TeamStatus.REPLACED)
+            certificate.save()
+        return certificate
+
+    @classmethod
+    def retry_delay(cls, attempts: int) -> timedelta:
+        """
+        get the time to wait before retrying a failed issuance
+        :param attempts: the number of attempts so far
+        :return: ACME_JOB_RETRY_DELAY, doubled for every further attempt
+        """
+        return timedelta(
+            seconds=min(
+                settings.ACME_JOB_RETRY_DELAY * 2 ** max(attempts - 1, 0),
+                settings.ACME_JOB_MAX_RETRY_DELAY,
+            )
         )
-        pem = acme.retrieve_certificate()
-        cert.certificate = pem
-        cert.status = TeamStatus.ACTIVE
-        cert.save()
-        return cert
+
+    @classmethod
+    def process_certificates(cls, limit: int = None) -> int:
+        """
+        issue queued certificates until the queue is empty
+        :param limit: maximum number of certificates to process
+        :return: the number of processed certificates
+        """
+        processed = 0
+        while limit is None or processed < limit:
+            certificate = cls.claim_certificate()
+            if certificate is None:
+                break
+            cls.issue_certificate(certificate)
+            processed += 1
+        return processed
+
+    @classmethod
+    def queue_renewals(cls, days: int) -> int:
+        """
+        queue a renewal for every active certificate expiring within some days,
+        unless one is queued or pending already; failed renewals are replaced by
+        the new ones
+        :param days: the renewal window
+        :return: the number of queued renewals
+        """
+        expiring = list(
+            TeamCertificate.objects.filter(
+                status=TeamStatus.ACTIVE,
+                valid_until__lt=timezone.now() + timedelta(days=days),
+            ).exclude(renewals__status__in=[TeamStatus.QUEUED, TeamStatus.PENDING])
+        )
+
+        failed = TeamCertificate.objects.filter(
+            renews__in=expiring, status=TeamStatus.FAILED
+        )
+        for renews_id, error in failed.values_list("renews_id", "error"):
+            logger.warning("renewal of certificate %s failed: %s", renews_id, error)
+        failed.delete()
+
+        renewals = TeamCertificate.objects.bulk_create(
+            TeamCertificate(
+                team_id=certificate.team_id,
+                public_key=certificate.public_key,
+                csr=certificate.csr,
+                contact_email=certificate.contact_email,
+                status=TeamStatus.QUEUED,
+                renews=certificate,
+            )
+            for certificate in expiring
+        )
+        return len(renewals)
+
+    @classmethod
+    def renewal_backlog(cls, days: int) -> Dict[str, int]:
+        """
+        count the certificates waiting for their renewal
+        :param days: the renewal window
+        :return: dict with the number of expiring, expired, queued and failed renewals
+        """
+        now = timezone.now()
+        active = TeamCertificate.objects.filter(status=TeamStatus.ACTIVE)
+        renewals = TeamCertificate.objects.filter(renews__isnull=False)
+        return {
+            **active.aggregate(
+                expiring=Count(
+                    "pk", filter=Q(valid_until__lt=now + timedelta(days=days))
+                ),
+                expired=Count("pk", filter=Q(valid_until__lt=now)),
+            ),
+            **renewals.aggregate(
+                queued=Count(
+                    "pk", filter=Q(status__in=[TeamStatus.QUEUED, TeamStatus.PENDING])
+                ),
+                failed=Count("pk", filter=Q(status=TeamStatus.FAILED)),
+            ),
+        }
+
+    @classmethod
+    def renew_certificates(cls, days: int, workers: int) -> Dict[str, int]:
+        """
+        queue the renewals of expiring certificates and issue all queued
+        certificates with up to workers at the same time
+        :param days: the renewal window
+        :param workers: number of certificates issued at the same time
+        :return: the renewal backlog after the run, see renewal_backlog
+        """
+        cls.queue_renewals(days)
+        if workers <= 1:
+            cls.process_certificates()
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for _ in range(workers):
+                    executor.submit(cls._process_certificates_in_thread)
+
+        backlog = cls.renewal_backlog(days)
+        logger.info(
+            "certificate renewal backlog: %s",
+            ", ".join(f"{key}={value}" for key, value in backlog.items()),
+        )
+        return backlog
+
+    @classmethod
+    def _process_certificates_in_thread(cls):
+        try:
+            cls.process_certificates()
+        finally:
+            # every thread opened its own connection
+            connection.close()
+
+
+# acme clients by directory url and contact email, with the expiry of their
+# directory; every thread gets its own clients, the nonces of a client's session
+# must not be shared between threads
+_acme_clients = threading.local()
 
 
 # inspired by https://github.com/certbot/certbot/blob/2622a700e0a83e0de0994c970929b624b98dad40/acme/examples/http01_example.py#L67
@@ -392,7 +732,7 @@ class ACMEService(Service):
         """fetches the directory information
         :return: the Directory` object
         """
-        directory = requests.get(directory_url)
+        directory = requests.get(directory_url, verify=settings.ACME_VERIFY_SSL)
         return Directory(directory.json())
 
     @classmethod
@@ -406,24 +746,98 @@ class ACMEService(Service):
         )
         return josepy.JWKRSA(key=josepy.ComparableRSAKey(rsa_key))
 
+    @classmethod
+    def _dump_account_key(cls, keypair: JWKRSA) -> str:
+        """
+        serialize an account key for the database
+        :return: the private key as pem, encrypted with the SECRET_KEY
+        """
+        return keypair.key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.BestAvailableEncryption(settings.SECRET_KEY.encode()),
+        ).decode()
+
+    @classmethod
+    def _load_account_key(cls, key: str) -> JWKRSA:
+        """
+        load an account key stored by _dump_account_key
+        :return: the JWKRSA object
+        """
+        return JWKRSA(
+            key=serialization.load_pem_private_key(
+                key.encode(), settings.SECRET_KEY.encode(), backend=default_backend()
+            )
+        )
+
+    @classmethod
+    def _account_network(
+        cls, directory: Directory, directory_url: str, email: str
+    ) -> ClientNetwork:
+        """
+        get the network of the stored acme account for an email, the account is
+        registered if there is none yet
+        :return: the ClientNetwork signing with the account key
+        """
+        account = AcmeAccount.objects.filter(
+            directory_url=directory_url, contact_email=email
+        ).first()
+        if account is not None:
+            return ClientNetwork(
+                cls._load_account_key(account.key),
+                account=RegistrationResource.json_loads(account.registration),
+                verify_ssl=settings.ACME_VERIFY_SSL,
+            )
+
+        keypair = cls._generate_keypair()
+        client_network = ClientNetwork(keypair, verify_ssl=settings.ACME_VERIFY_SSL)
+        registration = Registration.from_data(email=email, terms_of_service_agreed=True)
+        result = ClientV2(directory, client_network).new_account(registration)
+        try:
+            with transaction.atomic():
+                AcmeAccount.objects.create(
+                    directory_url=directory_url,
+                    contact_email=email,
+                    key=cls._dump_account_key(keypair),
+                    registration=result.json_dumps(),
+                )
+        except IntegrityError:
+            # registered by another worker at the same time, both accounts work
+            pass
+        return client_network
+
     @classmethod
     def register_account(
         cls,
         email: str,
-        directory_url: str = "https://acme-v02.api.letsencrypt.org/directory",
+        directory_url: str = None,
     ):
         """
-        create a new acme account
+        get an acme client for an account, the account, its session and the
+        directory are reused between calls of the same thread
         :param email: the email address that should be used for the account
-        :param directory_url: the url of the acme directory that should be used
+        :param directory_url: the url of the acme directory, ACME_DIRECTORY_URL if None
         :return: a new ACME client instance
         """
-        keypair = cls._generate_keypair()
-        client_network = ClientNetwork(keypair)
+        directory_url = directory_url or settings.ACME_DIRECTORY_URL
+        client_key = (directory_url, email)
+        if not hasattr(_acme_clients, "clients"):
+            _acme_clients.clients = {}
+        cached = _acme_clients.clients.get(client_key)
+        if cached is not None and cached[0] > time.monotonic():
+            return ACMEService(cached[1])
+
         directory = cls._get_directory(directory_url)
-        registration = Registration.from_data(email=email, terms_of_service_agreed=True)
+        if cached is not None:
+            # only the directory expired, the account and session are kept
+            client_network = cached[1].net
+        else:
+            client_network = cls._account_network(directory, directory_url, email)
         client = ClientV2(directory, client_network)
-        result = client.new_account(registration)
+        _acme_clients.clients[client_key] = (
+            time.monotonic() + settings.ACME_DIRECTORY_CACHE_TTL,
+            client,
+        )
         return ACMEService(client)
 
     def select_http01_challenge(self):
@@ -465,6 +879,12 @@ class EncryptionKeyService(Service, CRUDMixin):
         if not user.has_perm(CanAddEncryptionKeyPermission):
             raise PermissionError("You are not allowed to add a form key")
 
+        try:
+            get_pgp_fingerprint(public_key)
+        except ValueError as e:
+            raise FormServiceException(str(e))
+
+        # the fingerprint is computed when the key gets saved
         return cls._create(
             {
                 "user": user.pk,
@@ -473,6 +893,32 @@ class EncryptionKeyService(Service, CRUDMixin):
             }
         )
 
+    @classmethod
+    def retrieve_key_by_fingerprint(
+        cls, user: AbstractUser, fingerprint: str
+    ) -> EncryptionKey:
+        """
+        find an encryption key by its fingerprint
+        :param user: the user calling the service
+        :param fingerprint: the pgp fingerprint, whitespace and case are ignored
+        :return: the key object
+        """
+        try:
+            fingerprint = normalize_pgp_fingerprint(fingerprint)
+        except ValueError:
+            raise FormServiceException("This is not a valid fingerprint.")
+
+        keys = EncryptionKey.objects.filter(fingerprint=fingerprint)
+        # inactive keys are only visible to their owner and the key admins
+        if not user.has_perm(CanActivateEncryptionKeyPermission):
+            keys = keys.filter(Q(active=True) | Q(user=user))
+
+        # the same key may have been submitted more than once, active keys first
+        key = keys.order_by("-active", "pk").first()
+        if key is None:
+            raise FormServiceException("There is no key with this fingerprint.")
+        return key
+
     @classmethod
     @transaction.atomic
     def activate_key(
@@ -492,15 +938,50 @@ class EncryptionKeyService(Service, CRUDMixin):
         if public_key.active == True:
             raise FormServiceException("This public key is already active.")
 
+        # all memberships have to belong to the owner of the key
+        owned = set(
+            TeamMembership.objects.filter(
+                pk__in=keys.keys(), user=public_key.user_id
+            ).values_list("pk", flat=True)
+        )
+        foreign = set(keys.keys()) - owned
+        if foreign:
+            raise FormServiceException(
+                f"The membership {min(foreign)} doesn't belong to the owner of the key."
+            )
+
         public_key.active = True
         public_key.save()
 
-        for membership_id, key in keys.items():
-            TeamMembershipAccessKeyService.add_membership_key(
-                membership=membership_id, encryption_key=public_key_id, key=key
+        TeamMembershipAccessKey.objects.bulk_create(
+            TeamMembershipAccessKey(
+                membership_id=membership_id, encryption_key=public_key, key=key
             )
+            for membership_id, key in keys.items()
+        )
         return public_key
 
+    @classmethod
+    def retrieve_memberships_without_key(
+        cls, user: AbstractUser, public_key_id: int
+    ) -> List[TeamMembership]:
+        """
+        get the memberships of the owner of a key that have no access key for it yet
+        :param user: the user calling the service
+        :param public_key_id: id of the public key
+        :return: the memberships still lacking an encrypted key
+        """
+        if not user.has_perm(CanActivateEncryptionKeyPermission):
+            raise PermissionError("You are not allowed to activate this form key")
+        public_key = EncryptionKey.objects.get(id=public_key_id)
+
+        return list(
+            TeamMembership.objects.filter(user=public_key.user_id)
+            .exclude(access_keys__encryption_key=public_key)
+            .select_related("team")
+            .order_by("pk")
+        )
+
     @classmethod
     def remove_key(cls, user: AbstractUser, public_key_id: int) -> bool:
         """
@@ -1,8 +1,40 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete, post_init
+from django.utils import timezone
 
-### Define your signals here.
-# EXAMPLE:
-# @receiver(post_save, sender=SomeModel)
-# def do_something_at_post_save(instance, ...):
-#     ...
+from teams.models import TeamCertificate, EncryptionKey, TeamMembership
+from teams.services import TeamMembershipIndex
+from teams.utils import get_cert_valid_until, get_pgp_fingerprint
+
+
+@receiver(pre_save, sender=TeamCertificate)
+def store_certificate_valid_until(sender, instance, **kwargs):
+    """keep the stored expiry in sync with the certificate chain"""
+    if instance.certificate:
+        instance.valid_until = timezone.make_aware(
+            get_cert_valid_until(instance.certificate), timezone.utc
+        )
+    else:
+        instance.valid_until = None
+
+
+@receiver(post_init, sender=EncryptionKey)
+def remember_encryption_public_key(sender, instance, **kwargs):
+    # a deferred public key isn't loaded just for this
+    instance._stored_public_key = instance.__dict__.get("public_key")
+
+
+@receiver(pre_save, sender=EncryptionKey)
+def store_encryption_key_fingerprint(sender, instance, **kwargs):
+    """compute the fingerprint when the key is stored or its public key changes"""
+    if "public_key" not in instance.__dict__:
+        return
+    if instance._state.adding or instance.public_key != instance._stored_public_key:
+        instance.fingerprint = get_pgp_fingerprint(instance.public_key)
+        instance._stored_public_key = instance.public_key
+
+
+@receiver(post_save, sender=TeamMembership)
+@receiver(post_delete, sender=TeamMembership)
+def invalidate_team_membership_indexes(sender, **kwargs):
+    TeamMembershipIndex.invalidate()
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, RequestFactory
+from serious_django_permissions.management.commands import create_groups
+
+from settings.default_groups import InstanceAdminGroup
+from settings.schema import schema
+from teams.services import TeamService, TeamMembershipService
+from teams.tests.services.mock import create_mock_cert
+
+ALL_TEAMS_QUERY = """
+query {
+  allTeams {
+    edges {
+      node {
+        name
+        publicKey
+        members {
+          edges {
+            node {
+              role
+              user {
+                id
+                language
+                profilePicture
+              }
+            }
+          }
+        }
+        certificates {
+          edges {
+            node {
+              status
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+class TeamSchemaTest(TestCase):
+    def setUp(self):
+        create_groups.Command().handle()
+        self.admin = get_user_model().objects.create(username="instanceadmin")
+        self.admin.groups.add(InstanceAdminGroup)
+        self.request = RequestFactory().post("/graphql")
+        self.request.user = self.admin
+
+    def create_team(self, name):
+        team = TeamService.create(self.admin, name, {})
+        member = get_user_model().objects.create(username=f"{name}-member")
+        TeamMembershipService.add_member(self.admin, team.pk, {}, member.pk)
+        create_mock_cert(team)
+        return team
+
+    def execute(self):
+        # the loaders are cached on the request
+        self.request._dataloaders = {}
+        result = schema.execute(ALL_TEAMS_QUERY, context_value=self.request)
+        self.assertIsNone(result.errors)
+        return result.data["allTeams"]["edges"]
+
+    def test_all_teams_query_count(self):
+        for name in ["Hunditeam", "Katzenteam", "Vogelteam"]:
+            self.create_team(name)
+
+        # teams (count and rows), certificates, memberships, users and profiles
+        with self.assertNumQueries(6):
+            teams = self.execute()
+
+        self.assertEqual(len(teams), 3)
+        for team in teams:
+            self.assertIsNotNone(team["node"]["publicKey"])
+            self.assertEqual(len(team["node"]["members"]["edges"]), 2)
+            self.assertEqual(len(team["node"]["certificates"]["edges"]), 1)
+            for member in team["node"]["members"]["edges"]:
+                self.assertIsNotNone(member["node"]["user"]["language"])
+
+        self.create_team("Fischteam")
+        with self.assertNumQueries(6):
+            self.assertEqual(len(self.execute()), 4)
@@ -0,0 +1,142 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+
+from acme.messages import Directory, Registration, RegistrationResource
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from serious_django_permissions.management.commands import create_groups
+
+from settings.default_groups import InstanceAdminGroup
+from teams.models import AcmeAccount, TeamCertificate, TeamStatus
+from teams.services import (
+    ACMEService,
+    TeamService,
+    TeamCertificateService,
+    _acme_clients,
+)
+from teams.tests.services.mock import TEST_PUBLIC_KEY, create_mock_cert
+
+
+# nothing listens on the discard port, so every issuance fails right away
+@override_settings(
+    ACME_DIRECTORY_URL="http://127.0.0.1:9/directory",
+    ACME_JOB_MAX_ATTEMPTS=2,
+    ACME_JOB_RETRY_DELAY=0,
+)
+class TeamCertificateServiceTest(TestCase):
+    def setUp(self):
+        create_groups.Command().handle()
+        self.admin = get_user_model().objects.create(
+            username="instanceadmin", email="admin@example.com"
+        )
+        self.admin.groups.add(InstanceAdminGroup)
+        self.team = TeamService.create(self.admin, "Hunditeam", {})
+
+    def test_csr_is_queued(self):
+        TeamService.add_csr(self.admin, self.team.pk, "csr", TEST_PUBLIC_KEY)
+        certificate = self.team.certificates.get()
+        self.assertEqual(certificate.status, TeamStatus.QUEUED)
+        self.assertEqual(certificate.contact_email, "admin@example.com")
+
+    def test_certificate_is_claimed_once(self):
+        TeamService.add_csr(self.admin, self.team.pk, "csr", TEST_PUBLIC_KEY)
+        certificate = TeamCertificateService.claim_certificate()
+        self.assertEqual(certificate.status, TeamStatus.PENDING)
+        self.assertEqual(certificate.attempts, 1)
+        self.assertIsNone(TeamCertificateService.claim_certificate())
+
+        # the worker died, the certificate is picked up again after the timeout
+        TeamCertificate.objects.filter(pk=certificate.pk).update(
+            claimed_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(TeamCertificateService.claim_certificate(), certificate)
+
+    def test_failed_issuance_is_retried(self):
+        TeamService.add_csr(self.admin, self.team.pk, "csr", TEST_PUBLIC_KEY)
+
+        self.assertEqual(TeamCertificateService.process_certificates(limit=1), 1)
+        certificate = self.team.certificates.get()
+        self.assertEqual(certificate.status, TeamStatus.QUEUED)
+        self.assertNotEqual(certificate.error, "")
+
+        self.assertEqual(TeamCertificateService.process_certificates(), 1)
+        certificate.refresh_from_db()
+        self.assertEqual(certificate.status, TeamStatus.FAILED)
+        self.assertEqual(certificate.attempts, 2)
+
+    @override_settings(ACME_JOB_RETRY_DELAY=60, ACME_JOB_MAX_ATTEMPTS=3)
+    def test_failed_issuance_backs_off(self):
+        TeamService.add_csr(self.admin, self.team.pk, "csr", TEST_PUBLIC_KEY)
+
+        self.assertEqual(TeamCertificateService.process_certificates(), 1)
+        certificate = self.team.certificates.get()
+        self.assertEqual(certificate.status, TeamStatus.QUEUED)
+        self.assertGreater(certificate.next_attempt_at, timezone.now())
+        # not retried before the delay is over
+        self.assertIsNone(TeamCertificateService.claim_certificate())
+
+        self.assertEqual(TeamCertificateService.retry_delay(2), timedelta(seconds=120))
+        TeamCertificate.objects.filter(pk=certificate.pk).update(
+            next_attempt_at=timezone.now()
+        )
+        self.assertEqual(TeamCertificateService.claim_certificate(), certificate)
+
+    def test_stored_account_is_reused(self):
+        keypair = ACMEService._generate_keypair()
+        registration = RegistrationResource(
+            body=Registration.from_data(email="admin@example.com"),
+            uri="https://acme.example.com/acct/1",
+        )
+        AcmeAccount.objects.create(
+            directory_url="https://acme.example.com/directory",
+            contact_email="admin@example.com",
+            key=ACMEService._dump_account_key(keypair),
+            registration=registration.json_dumps(),
+        )
+
+        # no new key and no registration round-trip
+        network = ACMEService._account_network(
+            Directory({}), "https://acme.example.com/directory", "admin@example.com"
+        )
+        self.assertEqual(network.key, keypair)
+        # the private key isn't stored in plain text
+        self.assertIn("BEGIN ENCRYPTED PRIVATE KEY", AcmeAccount.objects.get().key)
+        self.assertEqual(network.account.uri, "https://acme.example.com/acct/1")
+
+    def test_renewal(self):
+        # the mock certificate expired in 2021
+        create_mock_cert(self.team)
+        self.assertEqual(TeamCertificateService.queue_renewals(30), 1)
+        self.assertEqual(TeamCertificateService.queue_renewals(30), 0)
+
+        backlog = TeamCertificateService.renew_certificates(30, workers=1)
+        self.assertEqual(
+            backlog, {"expiring": 1, "expired": 1, "queued": 0, "failed": 1}
+        )
+        # failed renewals are tried again on the next run, replacing the failed one
+        self.assertEqual(TeamCertificateService.queue_renewals(30), 1)
+        self.assertFalse(
+            self.team.certificates.filter(status=TeamStatus.FAILED).exists()
+        )
+
+    def test_acme_clients_are_per_thread(self):
+        client = object()
+        _acme_clients.clients = {
+            ("http://127.0.0.1:9/directory", "admin@example.com"): (
+                time.monotonic() + 60,
+                client,
+            )
+        }
+        self.addCleanup(_acme_clients.clients.clear)
+        self.assertIs(ACMEService.register_account("admin@example.com").client, client)
+
+        # another thread builds its own client, which fails on the discard port
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(ACMEService.register_account, "admin@example.com")
+        with self.assertRaises(requests.ConnectionError):
+            future.result()
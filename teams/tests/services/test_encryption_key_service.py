@@ -1,5 +1,6 @@
 import json
 import pgpy
+from pgpy.constants import PubKeyAlgorithm, KeyFlags
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.exceptions import PermissionDenied
@@ -12,9 +13,10 @@ from forms.management.commands import create_signature_key
 from forms.models import Form, SignatureKey
 from forms.services.forms import (
     FormService,
+    FormServiceException,
 )
 from forms.tests.utils import generate_test_keypair
-from teams.models import EncryptionKey
+from teams.models import EncryptionKey, TeamMembership
 from teams.services import TeamService, TeamMembershipService, EncryptionKeyService
 from settings.default_groups import AdministrativeStaffGroup, InstanceAdminGroup
 from teams.tests.services.mock import create_mock_cert
@@ -54,7 +56,9 @@ class EncryptionKeyServiceTest(TestCase):
         self.assertEqual(
             len(FormService.retrieve_public_keys_for_form(self.form.id)), 1
         )
-        key = EncryptionKeyService.add_key(self.user, "keeey")
+        key = EncryptionKeyService.add_key(
+            self.user, generate_test_keypair()["publickey"]
+        )
         self.assertEqual(
             len(FormService.retrieve_public_keys_for_form(self.form.id)), 1
         )
@@ -65,7 +69,9 @@ class EncryptionKeyServiceTest(TestCase):
         )
 
     def test_activate_key(self):
-        key = EncryptionKeyService.add_key(self.user, "keeey")
+        key = EncryptionKeyService.add_key(
+            self.user, generate_test_keypair()["publickey"]
+        )
         self.assertEqual(
             len(FormService.retrieve_public_keys_for_form(self.form.id)), 1
         )
@@ -76,10 +82,84 @@ class EncryptionKeyServiceTest(TestCase):
             len(FormService.retrieve_public_keys_for_form(self.form.id)), 1
         )
 
-        key_two = EncryptionKeyService.add_key(self.user, "keeey")
+        key_two = EncryptionKeyService.add_key(
+            self.user, generate_test_keypair()["publickey"]
+        )
         self.assertEqual(
             len(FormService.retrieve_public_keys_for_form(self.form.id)), 1
         )
 
         with self.assertRaises(PermissionError):
             key_two = EncryptionKeyService.activate_key(self.user, key_two, {})
+
+    def test_activate_key_fan_out(self):
+        membership = TeamMembership.objects.get(user=self.user, team=self.group)
+        admin_membership = TeamMembership.objects.get(user=self.admin, team=self.group)
+        key = EncryptionKeyService.add_key(
+            self.user, generate_test_keypair()["publickey"]
+        )
+        self.assertEqual(
+            EncryptionKeyService.retrieve_memberships_without_key(self.admin, key.pk),
+            [membership],
+        )
+
+        with self.assertRaises(FormServiceException):
+            EncryptionKeyService.activate_key(
+                self.admin, key.pk, {admin_membership.pk: "nope"}
+            )
+        key.refresh_from_db()
+        self.assertFalse(key.active)
+
+        EncryptionKeyService.activate_key(self.admin, key.pk, {membership.pk: "key"})
+        self.assertEqual(membership.access_keys.get(encryption_key=key).key, "key")
+        self.assertEqual(
+            EncryptionKeyService.retrieve_memberships_without_key(self.admin, key.pk),
+            [],
+        )
+
+    def test_fingerprint_lookup(self):
+        pkey = pgpy.PGPKey.new(PubKeyAlgorithm.RSAEncryptOrSign, 2048)
+        pkey.add_uid(
+            pgpy.PGPUID.new("Formularium@domain"),
+            usage={KeyFlags.EncryptCommunications},
+        )
+        key = EncryptionKeyService.add_key(self.user, str(pkey.pubkey))
+        self.assertEqual(key.fingerprint, str(pkey.fingerprint))
+
+        compact = key.fingerprint.replace(" ", "").lower()
+        self.assertEqual(
+            EncryptionKeyService.retrieve_key_by_fingerprint(self.user, compact), key
+        )
+        self.assertEqual(
+            EncryptionKeyService.retrieve_key_by_fingerprint(self.admin, compact), key
+        )
+
+        # inactive keys of other users are hidden
+        other = get_user_model().objects.create(username="other")
+        with self.assertRaises(FormServiceException):
+            EncryptionKeyService.retrieve_key_by_fingerprint(other, compact)
+
+        with self.assertRaises(FormServiceException):
+            EncryptionKeyService.retrieve_key_by_fingerprint(self.user, "nope")
+
+        # the same key submitted again, the active one is found
+        again = EncryptionKeyService.add_key(self.user, str(pkey.pubkey))
+        again.active = True
+        again.save()
+        self.assertEqual(
+            EncryptionKeyService.retrieve_key_by_fingerprint(self.user, compact), again
+        )
+
+    def test_invalid_key(self):
+        with self.assertRaises(FormServiceException):
+            EncryptionKeyService.add_key(self.user, "keeey")
+
+    def test_fingerprint_follows_public_key(self):
+        key = EncryptionKeyService.add_key(
+            self.user, generate_test_keypair()["publickey"]
+        )
+        fingerprint = key.fingerprint
+        key.public_key = self.keypair["publickey"]
+        key.save()
+        self.assertNotEqual(key.fingerprint, fingerprint)
+        self.assertEqual(key.fingerprint, self.first_key.fingerprint)
@@ -3,11 +3,13 @@ from django.test import TestCase, RequestFactory
 from django.contrib.auth import get_user_model
 from serious_django_permissions.management.commands import create_groups
 
-from teams.models import TeamRoleChoices
+from forms.tests.utils import generate_test_keypair
+from teams.models import TeamRoleChoices, EncryptionKey
 from teams.services import (
     TeamService,
     TeamServiceException,
     TeamMembershipService,
+    TeamMembershipIndex,
 )
 from settings.default_groups import AdministrativeStaffGroup, InstanceAdminGroup
 
@@ -127,3 +129,68 @@ class TeamMembershipServiceTest(TestCase):
         self.assertEqual(team.members.count(), 2)
         with self.assertRaises(TeamServiceException):
             TeamMembershipService.remove_member(self.admin, team.id, self.admin.id)
+
+    def test_membership_index(self):
+        team = TeamService.create(self.admin, "Hunditeam", {})
+        index = TeamMembershipIndex.load(self.admin, team.pk)
+        self.assertEqual((index.member_count, index.admin_count), (1, 1))
+        self.assertTrue(index.is_admin)
+        with self.assertNumQueries(0):
+            TeamMembershipIndex.load(self.admin, team.pk)
+
+        TeamMembershipService.add_member(self.admin, team.pk, {}, self.user.pk)
+        index = TeamMembershipIndex.load(self.admin, team.pk)
+        self.assertEqual((index.member_count, index.admin_count), (2, 1))
+        self.assertFalse(TeamMembershipIndex.load(self.user, team.pk).is_admin)
+        self.assertTrue(TeamMembershipIndex.load(self.user, team.pk).is_member)
+
+    def test_add_members(self):
+        team = TeamService.create(self.admin, "Hunditeam", {})
+        other = get_user_model().objects.create(username="other")
+        key = EncryptionKey.objects.create(
+            public_key=generate_test_keypair()["publickey"], user=other, active=True
+        )
+
+        memberships, errors = TeamMembershipService.add_members(
+            self.admin,
+            team.pk,
+            [
+                {"invited_user_id": self.user.pk, "keys": {}},
+                {
+                    "invited_user_id": other.pk,
+                    "keys": {key.pk: "encrypted"},
+                    "role": TeamRoleChoices.ADMIN,
+                },
+                {"invited_user_id": self.admin.pk, "keys": {}},
+                {"invited_user_id": 4711, "keys": {}},
+            ],
+        )
+        self.assertEqual(
+            {m.user_id: m.role for m in memberships},
+            {self.user.pk: TeamRoleChoices.MEMBER, other.pk: TeamRoleChoices.ADMIN},
+        )
+        self.assertEqual(set(errors.keys()), {self.admin.pk, 4711})
+        self.assertEqual(team.members.count(), 3)
+        self.assertEqual(
+            list(
+                team.members.get(user=other).access_keys.values_list("key", flat=True)
+            ),
+            ["encrypted"],
+        )
+        self.assertEqual(TeamMembershipIndex.load(self.admin, team.pk).admin_count, 2)
+
+        # missing keys are reported per user
+        key.user = get_user_model().objects.create(username="third")
+        key.save()
+        memberships, errors = TeamMembershipService.add_members(
+            self.admin, team.pk, [{"invited_user_id": key.user_id, "keys": {}}]
+        )
+        self.assertEqual(memberships, [])
+        self.assertIn(key.user_id, errors)
+
+    def test_add_members_unprivileged(self):
+        team = TeamService.create(self.admin, "Hunditeam", {})
+        with self.assertRaises(TeamServiceException):
+            TeamMembershipService.add_members(
+                self.user, team.pk, [{"invited_user_id": self.user.pk, "keys": {}}]
+            )
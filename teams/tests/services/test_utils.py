@@ -1,9 +1,15 @@
 import datetime
 import json
+from unittest import mock
+
 from django.test import TestCase, RequestFactory
+from django.contrib.auth import get_user_model
+from serious_django_permissions.management.commands import create_groups
 
-from teams.tests.services.mock import TEST_CERT, TEST_PUBLIC_KEY
-from teams.utils import cert_to_jwk, get_cert_valid_until
+from settings.default_groups import InstanceAdminGroup
+from teams.services import TeamService
+from teams.tests.services.mock import TEST_CERT, TEST_PUBLIC_KEY, create_mock_cert
+from teams.utils import cert_to_jwk, get_cert_valid_until, clear_certificate_cache
 
 
 class TestUtils(TestCase):
@@ -19,3 +25,25 @@ class TestUtils(TestCase):
     def test_certificate_valid_until(self):
         validity = get_cert_valid_until(TEST_CERT)
         self.assertEqual(validity.date(), datetime.date(day=6, month=8, year=2021))
+
+    def test_certificate_parsing_is_memoized(self):
+        clear_certificate_cache()
+        jwk = cert_to_jwk(TEST_CERT, TEST_PUBLIC_KEY)
+        validity = get_cert_valid_until(TEST_CERT)
+
+        with mock.patch("teams.utils.pem.parse") as parse:
+            self.assertEqual(cert_to_jwk(TEST_CERT, TEST_PUBLIC_KEY), jwk)
+            self.assertEqual(get_cert_valid_until(TEST_CERT), validity)
+            parse.assert_not_called()
+
+    def test_valid_until_is_stored(self):
+        create_groups.Command().handle()
+        admin = get_user_model().objects.create(username="instanceadmin")
+        admin.groups.add(InstanceAdminGroup)
+        team = TeamService.create(admin, "Hunditeam", {})
+        create_mock_cert(team)
+
+        certificate = team.certificates.get()
+        self.assertEqual(
+            certificate.valid_until.date(), datetime.date(day=6, month=8, year=2021)
+        )
@@ -1,10 +1,57 @@
 import base64
 import datetime
+import hashlib
 import json
+import threading
+import time
+from collections import OrderedDict
 from OpenSSL import crypto
 from josepy import JWK
 
 import pem
+import pgpy
+
+# parsed certificates are memoized by the sha256 of their pem text
+CERTIFICATE_CACHE_SIZE = 1024
+CERTIFICATE_CACHE_TTL = 60 * 60
+
+_certificate_cache = OrderedDict()
+_certificate_cache_lock = threading.Lock()
+
+
+def _memoized(name: str, compute, *texts: str):
+    """
+    get the result of a certificate helper from the lru/ttl cache
+    :param name: name of the helper, the cache is shared between all of them
+    :param compute: function that computes the result if it isn't cached
+    :param texts: the pem texts the result is computed from
+    :return: the (cached) result
+    """
+    digest = hashlib.sha256("\0".join(texts).encode()).hexdigest()
+    key = (name, digest)
+    now = time.monotonic()
+
+    with _certificate_cache_lock:
+        entry = _certificate_cache.get(key)
+        if entry is not None and entry[0] > now:
+            _certificate_cache.move_to_end(key)
+            return entry[1]
+
+    result = compute(*texts)
+
+    with _certificate_cache_lock:
+        _certificate_cache[key] = (now + CERTIFICATE_CACHE_TTL, result)
+        _certificate_cache.move_to_end(key)
+        while len(_certificate_cache) > CERTIFICATE_CACHE_SIZE:
+            _certificate_cache.popitem(last=False)
+
+    return result
+
+
+def clear_certificate_cache():
+    """remove all memoized certificate results"""
+    with _certificate_cache_lock:
+        _certificate_cache.clear()
 
 
 def cert_to_jwk(certificates: str, public_key: str) -> str:
@@ -14,7 +61,10 @@ def cert_to_jwk(certificates: str, public_key: str) -> str:
     :param public_key: the pem public key as string
     :return: the jwk as string
     """
+    return _memoized("jwk", _cert_to_jwk, certificates, public_key)
 
+
+def _cert_to_jwk(certificates: str, public_key: str) -> str:
     # convert public key to jwk
     public_key = crypto.load_publickey(crypto.FILETYPE_PEM, public_key)
     jwk = JWK.load(crypto.dump_publickey(crypto.FILETYPE_PEM, public_key))
@@ -41,7 +91,10 @@ def get_cert_valid_until(certificates: str) -> datetime:
     :param certificates: the certificates for the x5c as pem key list
     :return: the min remaining date as datetime
     """
+    return _memoized("valid_until", _get_cert_valid_until, certificates)
+
 
+def _get_cert_valid_until(certificates: str) -> datetime:
     min_remaining_date = None
     for cert in pem.parse(str.encode(certificates)):
         cert_pem = crypto.load_certificate(crypto.FILETYPE_PEM, cert.as_bytes())
@@ -55,3 +108,36 @@ def get_cert_valid_until(certificates: str) -> datetime:
             min_remaining_date = certificate_remaining_date
 
     return min_remaining_date
+
+
+def get_pgp_fingerprint(public_key: str) -> str:
+    """
+    get the fingerprint of an armored pgp key, the form validation, the service and
+    the pre_save receiver all ask for it, so it is memoized like the certificates
+    :param public_key: the armored public key
+    :raise ValueError: if the key can't be parsed
+    :return: the fingerprint
+    """
+    return _memoized("pgp_fingerprint", _get_pgp_fingerprint, public_key)
+
+
+def _get_pgp_fingerprint(public_key: str) -> str:
+    pkey = pgpy.PGPKey()
+    try:
+        pkey.parse(public_key)
+    except Exception as e:
+        # pgpy raises all kinds of errors on malformed or incomplete keys, a
+        # subkey exported without its primary key is parsed but can't be attached
+        # to it, its fingerprint is still known
+        if not pkey.fingerprint:
+            raise ValueError("This is not a valid pgp public key.") from e
+    return str(pkey.fingerprint)
+
+
+def normalize_pgp_fingerprint(fingerprint: str) -> str:
+    """
+    bring a fingerprint into the format pgpy uses (upper case, grouped by 4)
+    :param fingerprint: the fingerprint with or without whitespace
+    :return: the normalized fingerprint
+    """
+    return str(pgpy.types.Fingerprint("".join(fingerprint.split()).upper()))